@@ -1,5 +1,5 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import ASCENDING, TEXT, IndexModel
+from pymongo import ASCENDING, TEXT, IndexModel, UpdateOne
 import numpy as np
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
@@ -188,6 +188,62 @@ class MongoDBManager:
         )
         return result.modified_count > 0
 
+    async def get_documents_with_vectors(self, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Indexed chunk embeddings and metadata, without the chunk text"""
+        query = {"embeddings": {"$exists": True}}
+        if filters:
+            query.update(filters)
+        cursor = self.vectors.find(query, {"chunks": 0}).batch_size(256)
+        return [doc async for doc in cursor]
+
+    async def get_vectors_version(self, filters: Optional[Dict[str, Any]] = None) -> Tuple[int, Optional[str]]:
+        """(count, latest indexed_at) of indexed documents; changes when any worker adds, reindexes or deletes one"""
+        query = {"embeddings": {"$exists": True}}
+        if filters:
+            query.update(filters)
+        result = await self.vectors.aggregate([
+            {"$match": query},
+            {"$group": {"_id": None, "count": {"$sum": 1}, "latest": {"$max": "$indexed_at"}}}
+        ]).to_list(length=1)
+        if not result:
+            return 0, None
+        return result[0]["count"], result[0]["latest"]
+
+    async def get_chunk(self, document_id: str, index: int) -> Optional[str]:
+        """Text of a single indexed chunk"""
+        # $slice alone is an exclusion projection and would return the embeddings too;
+        # the document_id inclusion keeps the reply to the sliced chunk
+        doc = await self.vectors.find_one(
+            {"document_id": document_id},
+            {"_id": 0, "document_id": 1, "chunks": {"$slice": [index, 1]}}
+        )
+        chunks = doc.get("chunks") if doc else None
+        return chunks[0] if chunks else None
+
+    async def update_document_vectors(self, document_id: str, data: Dict[str, Any], upsert: bool = True) -> bool:
+        """Replace a document's indexed chunks and embeddings in one round trip"""
+        result = await self.vectors.update_one(
+            {"document_id": document_id},
+            {"$set": data},
+            upsert=upsert
+        )
+        return result.upserted_id is not None or result.matched_count > 0
+
+    async def batch_update_vectors(self, documents: List[Dict[str, Any]], upsert: bool = True) -> bool:
+        """Replace the indexed chunks and embeddings of several documents in one bulk write"""
+        if not documents:
+            return True
+        result = await self.vectors.bulk_write(
+            [UpdateOne({"document_id": doc["document_id"]}, {"$set": doc}, upsert=upsert) for doc in documents],
+            ordered=False
+        )
+        return result.upserted_count + result.matched_count == len(documents)
+
+    async def delete_document_vectors(self, document_id: str) -> bool:
+        """Remove a document's indexed chunks and embeddings, keeping the document itself"""
+        result = await self.vectors.delete_one({"document_id": document_id})
+        return result.deleted_count > 0
+
     async def delete_documents_batch(self, document_ids: List[str]) -> int:
         """Delete multiple documents and their vectors"""
         await self.vectors.delete_many({"document_id": {"$in": document_ids}})
@@ -0,0 +1,43 @@
+from typing import Dict, Tuple
+from sentence_transformers import SentenceTransformer
+import logging
+import os
+
+# CPU encoders run through ONNX Runtime with dynamic int8 quantization; USE_ONNX=0 keeps PyTorch
+USE_ONNX = os.getenv("USE_ONNX", "1") != "0"
+ONNX_QUANTIZATION = os.getenv("ONNX_QUANTIZATION", "avx512_vnni")
+ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", os.path.join(os.path.dirname(__file__), "onnx_models"))
+
+# One instance per (model, backend) for the whole process
+_models: Dict[Tuple[str, bool], SentenceTransformer] = {}
+
+def get_model(model_name: str, use_onnx: bool = USE_ONNX) -> SentenceTransformer:
+    """Return the shared SentenceTransformer for model_name, loading it on first use"""
+    key = (model_name, use_onnx)
+    model = _models.get(key)
+    if model is None:
+        model = _load_model(model_name, use_onnx)
+        _models[key] = model
+    return model
+
+def _load_model(model_name: str, use_onnx: bool) -> SentenceTransformer:
+    if use_onnx:
+        try:
+            return _load_quantized_onnx(model_name)
+        except Exception as e:
+            logging.error(f"Falling back to PyTorch for {model_name}: {str(e)}")
+    return SentenceTransformer(model_name)
+
+def _load_quantized_onnx(model_name: str) -> SentenceTransformer:
+    """Load the int8 ONNX export of model_name, exporting it on the first run"""
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    export_dir = os.path.join(ONNX_CACHE_DIR, model_name.replace('/', '__'))
+    file_name = f"onnx/model_qint8_{ONNX_QUANTIZATION}.onnx"
+
+    if not os.path.exists(os.path.join(export_dir, file_name)):
+        model = SentenceTransformer(model_name, backend="onnx")
+        model.save(export_dir)
+        export_dynamic_quantized_onnx_model(model, ONNX_QUANTIZATION, export_dir)
+
+    return SentenceTransformer(export_dir, backend="onnx", model_kwargs={"file_name": file_name})
@@ -2,8 +2,20 @@ from fastapi import FastAPI, File, UploadFile, WebSocket, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+from motor.motor_asyncio import AsyncIOMotorClient
 from app.processors.base import DocumentProcessor, URLProcessor, NotionProcessor, ConfluenceProcessor
+from app.processors.url_processors import shutdown_parse_pool
+from app.routers.processors import close_http_session
+from app.vector_store import create_vector_index
+from app.websocket_manager import manager as ws_manager
+from app.websocket_handlers import websocket_handler
+import orjson
 import os
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+from uuid import uuid4
 
 class URLRequest(BaseModel):
     url: str
@@ -13,6 +25,9 @@ class IntegrationRequest(BaseModel):
 
 app = FastAPI(title="Knowledge Window API")
 
+# Writes the root logger's records from a background thread
+_log_listener: Optional[QueueListener] = None
+
 # Minimal CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -22,6 +37,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def start_log_queue():
+    # Handlers run on the listener thread, so logging never blocks the event loop on I/O
+    global _log_listener
+    root = logging.getLogger()
+    log_queue = queue.SimpleQueue()
+    handlers = root.handlers[:] or [logging.StreamHandler()]
+    _log_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    root.handlers = [QueueHandler(log_queue)]
+    _log_listener.start()
+
+@app.on_event("startup")
+async def startup_db_client():
+    # One pooled client for the lifetime of the process, shared via app.state
+    app.state.mongodb = AsyncIOMotorClient(
+        os.getenv("MONGODB_URL", "mongodb://localhost:27017"),
+        maxPoolSize=100
+    )
+    await create_vector_index(app.state.mongodb)
+
+@app.on_event("startup")
+async def start_websocket_cleanup():
+    await ws_manager.start()
+
+@app.on_event("shutdown")
+async def shutdown_db_client():
+    app.state.mongodb.close()
+
+@app.on_event("shutdown")
+async def shutdown_parse_workers():
+    shutdown_parse_pool()
+    await close_http_session()
+
+@app.on_event("shutdown")
+async def stop_websocket_cleanup():
+    await ws_manager.stop()
+
+@app.on_event("shutdown")
+async def stop_log_queue():
+    if _log_listener is not None:
+        _log_listener.stop()
+
 @app.get("/")
 async def read_root():
     return {
@@ -79,10 +136,33 @@ async def websocket_endpoint(websocket: WebSocket):
             data = await websocket.receive_text()
             # Echo the received message with a processor status
             response = {"type": "message", "content": data, "status": "processed"}
-            await websocket.send_json(response)
+            # orjson writes UTF-8 directly; decoded because the client parses text frames
+            await websocket.send_text(orjson.dumps(response).decode())
     except Exception as e:
         await websocket.close()
 
+@app.websocket("/ws/preview")
+async def preview_websocket(websocket: WebSocket):
+    # Text frames are JSON messages; a preview_requested header with contentLen is
+    # followed by the document itself as binary frames
+    if not websocket_handler.processors:
+        # Processors load the embedding model, so they are created on first use
+        await websocket_handler.initialize(app.state.mongodb)
+    client_id = uuid4().hex
+    await websocket_handler.connect(websocket, client_id)
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            data = message.get("bytes")
+            if data is None:
+                data = message.get("text")
+            if data is not None:
+                await websocket_handler.handle_message(client_id, data)
+    finally:
+        websocket_handler.disconnect(client_id)
+
 # Minimal server configuration
 if __name__ == "__main__":
     import uvicorn
@@ -91,5 +171,7 @@ if __name__ == "__main__":
         app,
         host="0.0.0.0",
         port=port,
-        log_level="info"
+        log_level="info",
+        # Broadcast frames are compressed once by the WebSocket manager, not per connection
+        ws_per_message_deflate=False
     )
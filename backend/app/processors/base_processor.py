@@ -1,14 +1,19 @@
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
 import aiohttp
-from sentence_transformers import SentenceTransformer
+import numpy as np
 from motor.motor_asyncio import AsyncIOMotorClient
 from ..security.document_security import DocumentSecurity
+from ..embedding_models import get_model
+from ..vector_store import pack_embedding, score_vectors, fetch_scored
 from datetime import datetime
 
 class BaseProcessor(ABC):
+    # Whether process_content accepts a binary file object in place of bytes
+    accepts_stream = False
+
     def __init__(self):
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.model = get_model('all-MiniLM-L6-v2')
         self.security = DocumentSecurity()
         self._preview_length = 500
         self._mongodb: Optional[AsyncIOMotorClient] = None
@@ -26,7 +31,7 @@ class BaseProcessor(ABC):
             processed_result = await self.process_content(content, metadata)
 
             # Generate vector embedding from processed text
-            vector_embedding = self.model.encode(processed_result['content']).tolist()
+            vector_embedding = pack_embedding(self.model.encode(processed_result['content'], normalize_embeddings=True))
 
             # Prepare document with security
             secured_content = await self.security.secure_document(
@@ -110,47 +115,11 @@ class BaseProcessor(ABC):
 
     async def search_similar(self, text: str, limit: int = 5) -> list:
         """Search for similar documents using vector similarity"""
-        query_embedding = self.model.encode(text).tolist()
-
-        pipeline = [
-            {
-                "$addFields": {
-                    "similarity": {
-                        "$reduce": {
-                            "input": {"$range": [0, {"$size": "$vector_embedding"}]},
-                            "initialValue": 0,
-                            "in": {
-                                "$add": [
-                                    "$$value",
-                                    {"$multiply": [
-                                        {"$arrayElemAt": ["$vector_embedding", "$$this"]},
-                                        {"$arrayElemAt": [query_embedding, "$$this"]}
-                                    ]}
-                                ]
-                            }
-                        }
-                    }
-                }
-            },
-            {"$sort": {"similarity": -1}},
-            {"$limit": limit},
-            {
-                "$project": {
-                    "_id": 1,
-                    "title": 1,
-                    "text": 1,
-                    "metadata": 1,
-                    "similarity": 1
-                }
-            }
-        ]
-
-        results = []
-        async for doc in self.mongodb.aggregate(pipeline):
-            doc['_id'] = str(doc['_id'])
-            results.append(doc)
+        query_embedding = self.model.encode(text, normalize_embeddings=True).astype(np.float32)
 
-        return results
+        # Score on the client over ids and vectors only, then load display fields for the top hits
+        scored = await score_vectors(self.mongodb, query_embedding, limit)
+        return await fetch_scored(self.mongodb, scored, {"_id": 1, "title": 1, "text": 1, "metadata": 1})
 
     @staticmethod
     async def download_content(url: str) -> Optional[bytes]:
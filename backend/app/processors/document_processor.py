@@ -6,7 +6,8 @@ from datetime import datetime
 from docx import Document
 from bs4 import BeautifulSoup
 from motor.motor_asyncio import AsyncIOMotorClient
-from sentence_transformers import SentenceTransformer
+from ..embedding_models import get_model
+from ..vector_store import pack_embedding, score_vectors, fetch_scored
 import numpy as np
 from fastapi import HTTPException
 import logging
@@ -25,7 +26,7 @@ class DocumentProcessor:
         """Initialize the document processor with required models and connections"""
         try:
             logger.info("Initializing document processor...")
-            self.model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
+            self.model = get_model('paraphrase-multilingual-MiniLM-L12-v2')
             self.mongo_client = AsyncIOMotorClient("mongodb://localhost:27017")
             self.db = self.mongo_client.knowledge_window
             self.collection = self.db.documents
@@ -113,12 +114,12 @@ class DocumentProcessor:
             raise HTTPException(status_code=500, detail=f"Error processing Confluence page: {str(e)}")
 
     async def _process_text(self, text: str, source_type: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        if not self.model or not self.collection:
+        if self.model is None or self.collection is None:
             await self.initialize()
 
         try:
             # Generate embeddings
-            embeddings = self.model.encode(text)
+            embeddings = self.model.encode(text, normalize_embeddings=True)
 
             # Prepare document data
             doc_data = {
@@ -129,8 +130,8 @@ class DocumentProcessor:
                 "created_at": datetime.utcnow(),
             }
 
-            # Store in MongoDB
-            result = await self.collection.insert_one(doc_data)
+            # Stored as a float32 BSON vector; the response keeps the JSON-friendly list
+            result = await self.collection.insert_one({**doc_data, "vector_embedding": pack_embedding(embeddings)})
             doc_data["_id"] = str(result.inserted_id)
 
             return doc_data
@@ -139,51 +140,21 @@ class DocumentProcessor:
             raise HTTPException(status_code=500, detail=f"Error processing text: {str(e)}")
 
     async def search_documents(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
-        if not self.model or not self.collection:
+        if self.model is None or self.collection is None:
             await self.initialize()
 
         try:
             # Generate query embedding
-            query_embedding = self.model.encode(query)
-
-            # Find similar documents using vector similarity
-            pipeline = [
-                {
-                    "$addFields": {
-                        "similarity": {
-                            "$reduce": {
-                                "input": {"$range": [0, {"$size": "$vector_embedding"}]},
-                                "initialValue": 0,
-                                "in": {
-                                    "$add": [
-                                        "$$value",
-                                        {"$multiply": [
-                                            {"$arrayElemAt": ["$vector_embedding", "$$this"]},
-                                            {"$arrayElemAt": [query_embedding.tolist(), "$$this"]}
-                                        ]}
-                                    ]
-                                }
-                            }
-                        }
-                    }
-                },
-                {"$sort": {"similarity": -1}},
-                {"$limit": limit},
-                {"$project": {
-                    "content": 1,
-                    "source_type": 1,
-                    "metadata": 1,
-                    "created_at": 1,
-                    "similarity": 1
-                }}
-            ]
-
-            cursor = self.collection.aggregate(pipeline)
-            results = await cursor.to_list(length=limit)
-            return [
-                {**doc, "_id": str(doc["_id"])}
-                for doc in results
-            ]
+            query_embedding = self.model.encode(query, normalize_embeddings=True)
+
+            # Score packed and legacy array vectors alike, then load the winners
+            scored = await score_vectors(self.collection, query_embedding, limit)
+            return await fetch_scored(self.collection, scored, {
+                "content": 1,
+                "source_type": 1,
+                "metadata": 1,
+                "created_at": 1
+            })
         except Exception as e:
             logger.error(f"Error searching documents: {e}")
             raise HTTPException(status_code=500, detail=f"Error searching documents: {str(e)}")
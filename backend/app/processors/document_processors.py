@@ -1,7 +1,7 @@
 import io
 import fitz  # PyMuPDF
 from docx import Document
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, Optional, Tuple, Union, BinaryIO
 from .base_processor import BaseProcessor
 import chardet
 from datetime import datetime
@@ -73,13 +73,15 @@ class PDFProcessor(BaseProcessor):
         return ' '.join(text_content), structure
 
 class DOCXProcessor(BaseProcessor):
+    accepts_stream = True
+
     @property
     def content_type(self) -> str:
         return 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
 
-    async def process_content(self, content: bytes) -> Dict[str, Any]:
+    async def process_content(self, content: Union[bytes, BinaryIO]) -> Dict[str, Any]:
         try:
-            doc = Document(io.BytesIO(content))
+            doc = Document(content if hasattr(content, 'read') else io.BytesIO(content))
             metadata = self._extract_metadata(doc)
             text_content, structure = self._extract_content(doc)
 
@@ -183,4 +185,7 @@ def get_processor_for_content_type(content_type: str, mongodb_client) -> BasePro
     if not processor_class:
         raise ValueError(f"Unsupported content type: {content_type}")
 
-    return processor_class(mongodb_client)
+    processor = processor_class()
+    # Processors otherwise open their own client on first use; share the caller's pool
+    processor._mongodb = mongodb_client
+    return processor
@@ -1,9 +1,11 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Union, BinaryIO
 import docx
 import io
 from .base_processor import BaseProcessor
 
 class DOCXProcessor(BaseProcessor):
+    accepts_stream = True
+
     def __init__(self):
         super().__init__()
         self._preview_length = 500
@@ -12,11 +14,11 @@ class DOCXProcessor(BaseProcessor):
     def content_type(self) -> str:
         return 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
 
-    async def process_content(self, content: bytes, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    async def process_content(self, content: Union[bytes, BinaryIO], metadata: Dict[str, Any]) -> Dict[str, Any]:
         """Process DOCX content and extract text with metadata"""
         try:
-            # Create document object from bytes
-            doc_stream = io.BytesIO(content)
+            # Create document object from bytes or an already open file
+            doc_stream = content if hasattr(content, 'read') else io.BytesIO(content)
             doc = docx.Document(doc_stream)
 
             # Extract all text content with formatting
@@ -0,0 +1,131 @@
+from typing import Optional
+from collections import OrderedDict
+from datetime import datetime, timezone
+import hashlib
+import re
+import time
+import lxml.html
+from lxml import etree
+
+# (iso string, epoch second) of the last formatted timestamp
+_TS_CACHE = ['', 0]
+
+def _now_iso() -> str:
+    """Current UTC time as ISO 8601 at second granularity, formatted once per second"""
+    now = int(time.time())
+    if now != _TS_CACHE[1]:
+        _TS_CACHE[:] = [datetime.fromtimestamp(now, tz=timezone.utc).isoformat(), now]
+    return _TS_CACHE[0]
+
+# First run of digits in a string (reading times, clap counts)
+_FIRST_INT = re.compile(r'(\d+)')
+
+# lxml rejects str input that still carries an encoding declaration
+_XML_DECLARATION = re.compile(r'^\s*<\?xml[^>]*\?>')
+
+def _tree(content) -> lxml.html.HtmlElement:
+    """Parse HTML (str or raw bytes) into an lxml element tree; empty documents give an empty <html>"""
+    if isinstance(content, str):
+        content = _XML_DECLARATION.sub('', content, count=1)
+    if not content.strip():
+        return lxml.html.Element('html')
+    try:
+        return lxml.html.fromstring(content)
+    except etree.ParserError:
+        # e.g. only comments or a bare doctype
+        return lxml.html.Element('html')
+
+# Parsed trees keyed by (is_text, blake2b digest of the document), least recently used first
+_TREE_CACHE_SIZE = 256
+_tree_cache: "OrderedDict[tuple, lxml.html.HtmlElement]" = OrderedDict()
+
+def _cached_tree(content) -> lxml.html.HtmlElement:
+    """Parse ``content`` once per distinct document; the shared tree must not be mutated"""
+    is_text = isinstance(content, str)
+    data = content.encode('utf-8') if is_text else content
+    key = (is_text, hashlib.blake2b(data, digest_size=16).digest())
+
+    tree = _tree_cache.get(key)
+    if tree is not None:
+        _tree_cache.move_to_end(key)
+        return tree
+
+    tree = _tree(content)
+    _tree_cache[key] = tree
+    if len(_tree_cache) > _TREE_CACHE_SIZE:
+        _tree_cache.popitem(last=False)
+    return tree
+
+def _find_tag(root: lxml.html.HtmlElement, tag: str, *classes: str) -> Optional[lxml.html.HtmlElement]:
+    """Return the first ``tag`` element under ``root`` carrying any of ``classes``"""
+    wanted = set(classes)
+    for elem in root.iter(tag):
+        if not wanted:
+            return elem
+        class_attr = elem.get('class')
+        if class_attr and (class_attr in wanted or not wanted.isdisjoint(class_attr.split())):
+            return elem
+    return None
+
+def _text(elem: lxml.html.HtmlElement) -> str:
+    """Stripped text of ``elem`` and its descendants, concatenated in C by libxml2"""
+    return (elem.text_content() or '').strip()
+
+def _joined_text(elem: lxml.html.HtmlElement, separator: str = ' ') -> str:
+    """Join the stripped, non-empty text nodes under ``elem`` (like get_text(separator, strip=True))"""
+    return separator.join(text for text in (t.strip() for t in elem.itertext()) if text)
+
+# Markdown-style formatting per block tag; anything else is emitted as plain text
+_BLOCK_FORMATTERS = {
+    'h1': lambda text: f"# {text}",
+    'h2': lambda text: f"## {text}",
+    'h3': lambda text: f"### {text}",
+    'pre': lambda text: f"```\n{text}\n```",
+    'blockquote': lambda text: f"> {text}"
+}
+
+def _iter_blocks(root: lxml.html.HtmlElement, tags: tuple):
+    """Yield (tag, text) for each descendant of ``root`` in ``tags``, in document order"""
+    for _, elem in etree.iterwalk(root, events=('start',), tag=tags):
+        if elem is not root:
+            yield elem.tag, _text(elem)
+
+def _py_format_blocks(blocks: list) -> list:
+    """Format (tag, text) pairs into markdown-style strings"""
+    return [
+        _BLOCK_FORMATTERS[tag](text) if tag in _BLOCK_FORMATTERS else text
+        for tag, text in blocks
+    ]
+
+try:
+    # Compiled from url_render.pyx via `python setup.py build_ext --inplace`
+    from .url_render import format_blocks as _format_blocks
+except ImportError:
+    _format_blocks = _py_format_blocks
+
+def _render_blocks(root: lxml.html.HtmlElement,
+                   tags: tuple = ('p', 'h1', 'h2', 'h3', 'pre', 'li', 'blockquote')) -> str:
+    """Render the ``tags`` blocks under ``root`` as markdown-style text"""
+    return '\n\n'.join(_format_blocks(list(_iter_blocks(root, tags))))
+
+def _github_content_type(tree: lxml.html.HtmlElement) -> str:
+    """Classify a GitHub page as readme/issue/pull_request in one scan of article and div tags"""
+    is_issue = is_pull_request = False
+    for _, elem in etree.iterwalk(tree, events=('start',), tag=('article', 'div')):
+        classes = (elem.get('class') or '').split()
+        if not classes:
+            continue
+        if elem.tag == 'article':
+            # A README body wins wherever it appears on the page
+            if 'markdown-body' in classes:
+                return 'readme'
+        elif 'issue-header' in classes or 'gh-header-meta' in classes:
+            is_issue = True
+        elif 'pull-request-header' in classes:
+            is_pull_request = True
+
+    if is_issue:
+        return 'issue'
+    if is_pull_request:
+        return 'pull_request'
+    return 'unknown'
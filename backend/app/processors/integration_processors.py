@@ -2,6 +2,7 @@ from typing import Dict, Any, Optional
 import aiohttp
 from bs4 import BeautifulSoup
 from .base_processor import BaseProcessor
+from .url_processors import _url_platform
 
 class NotionProcessor(BaseProcessor):
     @property
@@ -124,9 +125,10 @@ class ConfluenceProcessor(BaseProcessor):
 
 def get_integration_processor(url: str, mongodb_client) -> BaseProcessor:
     """Factory function to get the appropriate integration processor"""
-    if 'notion.site' in url:
+    platform = _url_platform(url)
+    if platform == 'notion':
         return NotionProcessor(mongodb_client)
-    elif any(x in url for x in ['confluence', 'atlassian']):
+    elif platform == 'confluence':
         return ConfluenceProcessor(mongodb_client)
     else:
         raise ValueError(f"No integration processor available for URL: {url}")
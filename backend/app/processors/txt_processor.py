@@ -1,8 +1,16 @@
 from typing import Dict, Any, Optional
 import io
+from charset_normalizer import from_bytes
 from .base_processor import BaseProcessor
 
+# ASCII control characters below 0x20 removed from text content (tab, LF and CR are kept)
+_CTRL_BYTES = bytes(i for i in range(32) if i not in (9, 10, 13))
+_CTRL_CHARS = dict.fromkeys(_CTRL_BYTES)
+
 class TXTProcessor(BaseProcessor):
+    # Metadata shared by every processed file; everything is converted to UTF-8
+    _CONST_META = {'encoding': 'utf-8', 'source_type': 'txt'}
+
     def __init__(self):
         super().__init__()
         self._preview_length = 500
@@ -14,19 +22,18 @@ class TXTProcessor(BaseProcessor):
     async def process_content(self, content: bytes, metadata: Dict[str, Any]) -> Dict[str, Any]:
         """Process TXT content and extract text with metadata"""
         try:
-            # Decode text content with fallback encodings
-            text_content = None
-            encodings = ['utf-8', 'latin-1', 'cp1252']
-
-            for encoding in encodings:
-                try:
-                    text_content = content.decode(encoding)
-                    break
-                except UnicodeDecodeError:
-                    continue
-
-            if text_content is None:
-                raise ValueError("Unable to decode text content with supported encodings")
+            # Decode as UTF-8 (the common case), detect the encoding otherwise.
+            # For UTF-8 line endings and control characters are handled on the raw
+            # bytes, since ASCII bytes never occur inside multi-byte sequences.
+            try:
+                text_content = content.replace(b'\r\n', b'\n').replace(b'\r', b'\n') \
+                    .translate(None, _CTRL_BYTES).decode('utf-8')
+            except UnicodeDecodeError:
+                best_match = from_bytes(content).best()
+                # latin-1 maps every byte, so undetectable content still decodes
+                decoded = str(best_match) if best_match is not None else content.decode('latin-1')
+                text_content = decoded.replace('\r\n', '\n').replace('\r', '\n') \
+                    .translate(_CTRL_CHARS)
 
             # Clean and normalize text
             text_content = self._clean_text(text_content)
@@ -38,27 +45,23 @@ class TXTProcessor(BaseProcessor):
             # Extract title from first line or metadata
             title = metadata.get('title')
             if not title:
-                first_line = lines[0].strip() if lines else ''
-                title = first_line if len(first_line) <= 50 else "Untitled Text Document"
+                # Only a bounded prefix is inspected; longer first lines are rejected anyway
+                newline = text_content.find('\n', 0, 200)
+                head = text_content[:newline if newline >= 0 else 200].strip()
+                title = head if head and len(head) <= 50 else "Untitled Text Document"
 
-            # Prepare document metadata
-            doc_info = {
+            # Merge provided metadata with document statistics
+            doc_metadata = {
+                **metadata,
+                **self._CONST_META,
                 'title': title,
                 'line_count': len(lines),
                 'word_count': len(words),
                 'char_count': len(text_content),
                 'avg_line_length': sum(len(line) for line in lines) / len(lines) if lines else 0,
-                'encoding': 'utf-8',  # We convert everything to UTF-8
                 'has_unicode': any(ord(char) > 127 for char in text_content)
             }
 
-            # Merge with provided metadata
-            doc_metadata = {
-                **metadata,
-                **doc_info,
-                'source_type': 'txt'
-            }
-
             return {
                 'content': text_content,
                 'metadata': doc_metadata
@@ -68,13 +71,7 @@ class TXTProcessor(BaseProcessor):
             raise ValueError(f"Error processing TXT content: {str(e)}")
 
     def _clean_text(self, text: str) -> str:
-        """Clean and normalize text content"""
-        # Normalize line endings
-        text = text.replace('\r\n', '\n').replace('\r', '\n')
-
-        # Remove null bytes and other control characters
-        text = ''.join(char for char in text if ord(char) >= 32 or char in '\n\t')
-
+        """Clean text whose line endings and control characters are already normalized"""
         # Remove excessive blank lines
         lines = [line.strip() for line in text.split('\n')]
         text = '\n'.join(line for line in lines if line)
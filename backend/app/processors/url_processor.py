@@ -1,14 +1,23 @@
 from typing import Dict, Any, Optional, List
+from collections import Counter, OrderedDict
+import asyncio
+import copy
+import hashlib
 import aiohttp
-from bs4 import BeautifulSoup
+from .html_utils import _cached_tree, _find_tag, _text, _render_blocks, _FIRST_INT, \
+    _github_content_type, _now_iso
+import lxml.html
 from urllib.parse import urlparse
 import json
 from .base_processor import BaseProcessor
 import trafilatura
 from readability import Document
-import re
+import io
 import logging
-from datetime import datetime
+
+# Extraction results keyed by (blake2b digest of the HTML, url), least recently used first
+_EXTRACTION_CACHE_SIZE = 128
+_extraction_cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
 
 class URLProcessor(BaseProcessor):
     def __init__(self):
@@ -34,47 +43,68 @@ class URLProcessor(BaseProcessor):
             if not url:
                 raise ValueError("URL not provided in metadata")
 
-            html = content.decode('utf-8')
-            domain = urlparse(url).netloc
+            if metadata.get('no_cache'):
+                return await self._extract_content(content, url)
 
-            # Try trafilatura first for best content extraction
-            extracted_text = trafilatura.extract(html,
-                                              include_comments=False,
-                                              include_tables=True,
-                                              include_links=True,
-                                              no_fallback=False)
+            # Identical HTML fetched from the same URL yields identical results
+            cache_key = (hashlib.blake2b(content, digest_size=16).digest(), url)
+            cached = _extraction_cache.get(cache_key)
+            if cached is not None:
+                _extraction_cache.move_to_end(cache_key)
+                return copy.deepcopy(cached)
 
-            # Parse content based on domain or fall back to generic
-            parser = next((parser for domain_key, parser in self.supported_domains.items()
-                         if domain_key in domain), self._parse_generic)
-            parsed_content = await parser(html)
+            result = await self._extract_content(content, url)
+            _extraction_cache[cache_key] = copy.deepcopy(result)
+            if len(_extraction_cache) > _EXTRACTION_CACHE_SIZE:
+                _extraction_cache.popitem(last=False)
+            return result
 
-            # Use extracted text if available, otherwise use parsed content
-            final_text = extracted_text if extracted_text else parsed_content['text']
+        except Exception as e:
+            raise ValueError(f"Error processing URL content: {str(e)}")
 
-            # Use readability as fallback for title
-            if not parsed_content['title']:
-                doc = Document(html)
-                parsed_content['title'] = doc.title()
+    async def _extract_content(self, content: bytes, url: str) -> Dict[str, Any]:
+        """Run the full extraction pipeline over downloaded HTML"""
+        html = content.decode('utf-8')
+        domain = urlparse(url).netloc
 
-            # Analyze content structure
-            structure = self._analyze_content_structure(html)
+        # Parse content based on domain or fall back to generic
+        parser = next((parser for domain_key, parser in self.supported_domains.items()
+                     if domain_key in domain), self._parse_generic)
 
-            return {
-                'content': final_text,
-                'metadata': {
-                    'title': parsed_content['title'],
-                    'url': url,
-                    'domain': domain,
-                    'source_type': parsed_content['source_type'],
-                    'extraction_method': 'trafilatura' if extracted_text else 'fallback',
-                    'structure': structure,
-                    **parsed_content['metadata']
-                }
+        # Run trafilatura (preferred for content extraction) in a worker thread
+        # so it overlaps with the domain-specific parse
+        extracted_text, parsed_content = await asyncio.gather(
+            asyncio.to_thread(trafilatura.extract, html,
+                              include_comments=False,
+                              include_tables=True,
+                              include_links=True,
+                              no_fallback=False),
+            parser(html)
+        )
+
+        # Use extracted text if available, otherwise use parsed content
+        final_text = extracted_text if extracted_text else parsed_content['text']
+
+        # Use readability as fallback for title
+        if not parsed_content['title']:
+            parsed_content['title'] = await asyncio.to_thread(lambda: Document(html).title())
+
+        # Analyze content structure
+        structure = self._analyze_content_structure(html)
+
+        return {
+            'content': final_text,
+            'metadata': {
+                'title': parsed_content['title'],
+                'url': url,
+                'domain': domain,
+                'source_type': parsed_content['source_type'],
+                'extraction_method': 'trafilatura' if extracted_text else 'fallback',
+                'structure': structure,
+                **parsed_content['metadata']
             }
+        }
 
-        except Exception as e:
-            raise ValueError(f"Error processing URL content: {str(e)}")
 
     def _get_headers(self) -> Dict[str, str]:
         """Get headers for URL requests"""
@@ -89,20 +119,25 @@ class URLProcessor(BaseProcessor):
 
     async def _parse_notion(self, html: str) -> Dict:
         """Parse Notion-specific content"""
-        soup = BeautifulSoup(html, 'html.parser')
+        tree = _cached_tree(html)
 
-        title = self._extract_title(soup)
-        content_blocks = soup.find_all(['div', 'p', 'h1', 'h2', 'h3', 'li'],
-                                     class_=lambda x: x and 'notion-' in x)
+        title = self._extract_title(tree)
+        content_blocks = tree.xpath(
+            '//*[self::div or self::p or self::h1 or self::h2 or self::h3 or self::li]'
+            '[contains(@class, "notion-")]'
+        )
 
         text_blocks = []
         for block in content_blocks:
-            if 'notion-text-block' in str(block.get('class', [])):
-                text_blocks.append(block.get_text(strip=True))
-            elif any(header in str(block.get('class', [])) for header in ['h1', 'h2', 'h3']):
-                level = next(i for i, h in enumerate(['h1', 'h2', 'h3'], 1)
-                           if h in str(block.get('class', [])))
-                text_blocks.append(f"{'#' * level} {block.get_text(strip=True)}")
+            classes = (block.get('class') or '').split()
+            if 'notion-text-block' in classes:
+                text_blocks.append(_text(block))
+                continue
+
+            header_level = next((i for i, h in enumerate(('h1', 'h2', 'h3'), 1)
+                                 if any(h in cls for cls in classes)), None)
+            if header_level:
+                text_blocks.append(f"{'#' * header_level} {_text(block)}")
 
         return {
             'title': title,
@@ -110,61 +145,59 @@ class URLProcessor(BaseProcessor):
             'source_type': 'notion',
             'metadata': {
                 'blocks_count': len(content_blocks),
-                'has_table_of_contents': bool(soup.find(class_='notion-table-of-contents'))
+                'has_table_of_contents': bool(tree.find_class('notion-table-of-contents'))
             }
         }
 
     async def _parse_confluence(self, html: str) -> Dict:
         """Parse Confluence-specific content"""
-        soup = BeautifulSoup(html, 'html.parser')
+        tree = _cached_tree(html)
 
-        title = self._extract_title(soup)
-        content = soup.find('div', {'id': 'main-content'}) or \
-                 soup.find('div', class_='wiki-content')
+        title = self._extract_title(tree)
+        content = next(iter(tree.xpath('//div[@id="main-content"]')), None)
+        if content is None:
+            content = _find_tag(tree, 'div', 'wiki-content')
 
-        text_blocks = []
-        if content:
-            for elem in content.find_all(['p', 'h1', 'h2', 'h3', 'li', 'pre', 'table']):
-                if elem.name in ['h1', 'h2', 'h3']:
-                    level = int(elem.name[1])
-                    text_blocks.append(f"{'#' * level} {elem.get_text(strip=True)}")
-                elif elem.name == 'pre':
-                    text_blocks.append(f"```\n{elem.get_text(strip=True)}\n```")
-                else:
-                    text_blocks.append(elem.get_text(strip=True))
+        text = ''
+        if content is not None:
+            text = _render_blocks(content, ('p', 'h1', 'h2', 'h3', 'li', 'pre', 'table'))
 
         return {
             'title': title,
-            'text': '\n\n'.join(text_blocks),
+            'text': text,
             'source_type': 'confluence',
             'metadata': {
-                'page_id': self._extract_confluence_page_id(html),
-                'has_attachments': bool(soup.find('div', class_='attachments')),
-                'has_comments': bool(soup.find('div', id='comments-section'))
+                'page_id': self._extract_confluence_page_id(tree),
+                'has_attachments': _find_tag(tree, 'div', 'attachments') is not None,
+                'has_comments': bool(tree.xpath('//div[@id="comments-section"]'))
             }
         }
 
     async def _parse_google_docs(self, html: str) -> Dict[str, Any]:
         """Parse Google Docs content"""
         try:
-            soup = BeautifulSoup(html, 'html.parser')
+            tree = _cached_tree(html)
 
             # Extract content from Google Docs structure
-            content_elem = soup.find('div', class_='kix-appview-editor')
-            title = soup.find('div', class_='docs-title-input')
-
-            text_blocks = []
-            if content_elem:
-                for elem in content_elem.find_all(['p', 'h1', 'h2', 'h3', 'li']):
-                    text_blocks.append(elem.get_text(strip=True))
+            content_elem = _find_tag(tree, 'div', 'kix-appview-editor')
+            title = _find_tag(tree, 'div', 'docs-title-input')
+
+            text = io.StringIO()
+            blocks_count = 0
+            if content_elem is not None:
+                for elem in content_elem.iter('p', 'h1', 'h2', 'h3', 'li'):
+                    if blocks_count:
+                        text.write('\n\n')
+                    text.write(_text(elem))
+                    blocks_count += 1
 
             return {
-                'title': title.get_text(strip=True) if title else "Untitled Document",
-                'text': '\n\n'.join(text_blocks),
+                'title': _text(title) if title is not None else "Untitled Document",
+                'text': text.getvalue(),
                 'source_type': 'google_docs',
                 'metadata': {
-                    'blocks_count': len(text_blocks),
-                    'last_modified': self._extract_google_docs_metadata(soup)
+                    'blocks_count': blocks_count,
+                    'last_modified': self._extract_google_docs_metadata(tree)
                 }
             }
         except Exception as e:
@@ -174,34 +207,25 @@ class URLProcessor(BaseProcessor):
     async def _parse_medium(self, html: str) -> Dict[str, Any]:
         """Parse Medium article content"""
         try:
-            soup = BeautifulSoup(html, 'html.parser')
+            tree = _cached_tree(html)
 
             # Extract article content
-            article = soup.find('article')
-            title = soup.find('h1')
-            author = soup.find('meta', {'name': 'author'})
-
-            text_blocks = []
-            if article:
-                for elem in article.find_all(['p', 'h1', 'h2', 'h3', 'pre', 'blockquote']):
-                    if elem.name in ['h1', 'h2', 'h3']:
-                        level = int(elem.name[1])
-                        text_blocks.append(f"{'#' * level} {elem.get_text(strip=True)}")
-                    elif elem.name == 'pre':
-                        text_blocks.append(f"```\n{elem.get_text(strip=True)}\n```")
-                    elif elem.name == 'blockquote':
-                        text_blocks.append(f"> {elem.get_text(strip=True)}")
-                    else:
-                        text_blocks.append(elem.get_text(strip=True))
+            article = _find_tag(tree, 'article')
+            title = _find_tag(tree, 'h1')
+            author = tree.xpath('//meta[@name="author"]/@content')
+
+            text = ''
+            if article is not None:
+                text = _render_blocks(article, ('p', 'h1', 'h2', 'h3', 'pre', 'blockquote'))
 
             return {
-                'title': title.get_text(strip=True) if title else "Untitled Article",
-                'text': '\n\n'.join(text_blocks),
+                'title': _text(title) if title is not None else "Untitled Article",
+                'text': text,
                 'source_type': 'medium',
                 'metadata': {
-                    'author': author.get('content') if author else None,
-                    'reading_time': self._extract_medium_reading_time(soup),
-                    'claps': self._extract_medium_claps(soup)
+                    'author': author[0] if author else None,
+                    'reading_time': self._extract_medium_reading_time(tree),
+                    'claps': self._extract_medium_claps(tree)
                 }
             }
         except Exception as e:
@@ -211,33 +235,26 @@ class URLProcessor(BaseProcessor):
     async def _parse_github(self, html: str) -> Dict[str, Any]:
         """Parse GitHub content"""
         try:
-            soup = BeautifulSoup(html, 'html.parser')
+            tree = _cached_tree(html)
 
             # Detect content type (README, Issue, PR, etc.)
-            content_type = self._determine_github_content_type(soup)
+            content_type = self._determine_github_content_type(tree)
 
             content_elem = None
             if content_type == 'readme':
-                content_elem = soup.find('article', class_='markdown-body')
+                content_elem = _find_tag(tree, 'article', 'markdown-body')
             elif content_type in ['issue', 'pull_request']:
-                content_elem = soup.find('div', class_='comment-body')
-
-            text_blocks = []
-            if content_elem:
-                for elem in content_elem.find_all(['p', 'h1', 'h2', 'h3', 'pre', 'li']):
-                    if elem.name in ['h1', 'h2', 'h3']:
-                        level = int(elem.name[1])
-                        text_blocks.append(f"{'#' * level} {elem.get_text(strip=True)}")
-                    elif elem.name == 'pre':
-                        text_blocks.append(f"```\n{elem.get_text(strip=True)}\n```")
-                    else:
-                        text_blocks.append(elem.get_text(strip=True))
+                content_elem = _find_tag(tree, 'div', 'comment-body')
+
+            text = ''
+            if content_elem is not None:
+                text = _render_blocks(content_elem, ('p', 'h1', 'h2', 'h3', 'pre', 'li'))
 
             return {
-                'title': self._extract_github_title(soup, content_type),
-                'text': '\n\n'.join(text_blocks),
+                'title': self._extract_github_title(tree, content_type),
+                'text': text,
                 'source_type': f'github_{content_type}',
-                'metadata': self._extract_github_metadata(soup, content_type)
+                'metadata': self._extract_github_metadata(tree, content_type)
             }
         except Exception as e:
             logging.error(f"Error parsing GitHub content: {str(e)}")
@@ -246,33 +263,26 @@ class URLProcessor(BaseProcessor):
     async def _parse_gitlab(self, html: str) -> Dict[str, Any]:
         """Parse GitLab content"""
         try:
-            soup = BeautifulSoup(html, 'html.parser')
+            tree = _cached_tree(html)
 
             # Detect content type (README, Issue, MR, etc.)
-            content_type = self._determine_gitlab_content_type(soup)
+            content_type = self._determine_gitlab_content_type(tree)
 
             content_elem = None
             if content_type == 'readme':
-                content_elem = soup.find('article', class_='markdown-body')
+                content_elem = _find_tag(tree, 'article', 'markdown-body')
             elif content_type in ['issue', 'merge_request']:
-                content_elem = soup.find('div', class_='note-text')
-
-            text_blocks = []
-            if content_elem:
-                for elem in content_elem.find_all(['p', 'h1', 'h2', 'h3', 'pre', 'li']):
-                    if elem.name in ['h1', 'h2', 'h3']:
-                        level = int(elem.name[1])
-                        text_blocks.append(f"{'#' * level} {elem.get_text(strip=True)}")
-                    elif elem.name == 'pre':
-                        text_blocks.append(f"```\n{elem.get_text(strip=True)}\n```")
-                    else:
-                        text_blocks.append(elem.get_text(strip=True))
+                content_elem = _find_tag(tree, 'div', 'note-text')
+
+            text = ''
+            if content_elem is not None:
+                text = _render_blocks(content_elem, ('p', 'h1', 'h2', 'h3', 'pre', 'li'))
 
             return {
-                'title': self._extract_gitlab_title(soup, content_type),
-                'text': '\n\n'.join(text_blocks),
+                'title': self._extract_gitlab_title(tree, content_type),
+                'text': text,
                 'source_type': f'gitlab_{content_type}',
-                'metadata': self._extract_gitlab_metadata(soup, content_type)
+                'metadata': self._extract_gitlab_metadata(tree, content_type)
             }
         except Exception as e:
             logging.error(f"Error parsing GitLab content: {str(e)}")
@@ -280,29 +290,30 @@ class URLProcessor(BaseProcessor):
 
     async def _parse_generic(self, html: str) -> Dict[str, Any]:
         """Parse generic web page content"""
-        soup = BeautifulSoup(html, 'html.parser')
+        # Unwanted elements are dropped, so work on a copy of the shared tree
+        tree = copy.deepcopy(_cached_tree(html))
 
         # Remove unwanted elements
-        for element in soup(['script', 'style', 'nav', 'footer', 'iframe']):
-            element.decompose()
+        for element in list(tree.iter('script', 'style', 'nav', 'footer', 'iframe')):
+            element.drop_tree()
+
+        head_index = self._index_head(tree)
 
         # Extract title
-        title = self._extract_title(soup)
+        title = self._extract_title(tree, head_index)
 
         # Extract meta description
-        meta_desc = soup.find('meta', {'name': ['description', 'Description']})
-        description = meta_desc.get('content', '').strip() if meta_desc else ''
+        meta_desc = head_index.get(('meta', 'description'))
+        description = meta_desc.get('content', '').strip() if meta_desc is not None else ''
 
         # Extract main content
-        main_content = soup.find(['main', 'article', 'div', {'id': 'content'}])
-        if main_content:
-            text_blocks = main_content.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'li'])
+        main_content = next(tree.iter('main', 'article', 'div'), None)
+        if main_content is not None:
+            text_blocks = list(main_content.iter('p', 'h1', 'h2', 'h3', 'h4', 'li'))
         else:
-            text_blocks = soup.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'li'])
+            text_blocks = list(tree.iter('p', 'h1', 'h2', 'h3', 'h4', 'li'))
 
-        text = '\n'.join([block.get_text(strip=True)
-                         for block in text_blocks
-                         if block.get_text(strip=True)])
+        text = '\n'.join([block_text for block_text in map(_text, text_blocks) if block_text])
 
         return {
             'title': title,
@@ -315,172 +326,192 @@ class URLProcessor(BaseProcessor):
             }
         }
 
-    def _extract_title(self, soup: BeautifulSoup) -> str:
+    def _index_head(self, tree: lxml.html.HtmlElement) -> Dict[tuple, Any]:
+        """Index <meta>, <link> and <script> tags in a single pass over the document.
+
+        Keys are ('meta', name-or-property), ('link', rel) and ('script', type),
+        lowercased; the first tag for each key wins.
+        """
+        head_index = {}
+        for tag in tree.iter('meta', 'link', 'script'):
+            if tag.tag == 'meta':
+                key = tag.get('name') or tag.get('property')
+                if key:
+                    head_index.setdefault(('meta', key.lower()), tag)
+            elif tag.tag == 'link':
+                for rel in (tag.get('rel') or '').split():
+                    head_index.setdefault(('link', rel.lower()), tag)
+            elif tag.get('type'):
+                head_index.setdefault(('script', tag.get('type').lower()), tag)
+        return head_index
+
+    def _extract_title(self, tree: lxml.html.HtmlElement, head_index: Optional[Dict[tuple, Any]] = None) -> str:
         """Extract page title using multiple methods"""
+        if head_index is None:
+            head_index = self._index_head(tree)
+
         # Try meta title first
-        meta_title = soup.find('meta', property='og:title') or \
-                    soup.find('meta', {'name': 'title'})
-        if meta_title:
+        meta_title = head_index.get(('meta', 'og:title'))
+        if meta_title is None:
+            meta_title = head_index.get(('meta', 'title'))
+        if meta_title is not None:
             return meta_title.get('content', '').strip()
 
         # Try main title tag
-        title_tag = soup.find('title')
-        if title_tag:
-            return title_tag.text.strip()
+        title_tag = _find_tag(tree, 'title')
+        if title_tag is not None:
+            return _text(title_tag)
 
         # Try h1
-        h1_tag = soup.find('h1')
-        if h1_tag:
-            return h1_tag.text.strip()
+        h1_tag = _find_tag(tree, 'h1')
+        if h1_tag is not None:
+            return _text(h1_tag)
 
         return "Untitled Page"
 
     def _analyze_content_structure(self, html: str) -> Dict[str, Any]:
         """Analyze the structure of the web content"""
-        soup = BeautifulSoup(html, 'html.parser')
+        tree = _cached_tree(html)
+        head_index = self._index_head(tree)
+        counts = Counter(elem.tag for elem in tree.iter(
+            'h1', 'h2', 'h3', 'p', 'ul', 'ol', 'table', 'img', 'a', 'pre'))
 
         structure = {
             'headings': {
-                'h1': len(soup.find_all('h1')),
-                'h2': len(soup.find_all('h2')),
-                'h3': len(soup.find_all('h3'))
+                'h1': counts['h1'],
+                'h2': counts['h2'],
+                'h3': counts['h3']
             },
             'elements': {
-                'paragraphs': len(soup.find_all('p')),
-                'lists': len(soup.find_all(['ul', 'ol'])),
-                'tables': len(soup.find_all('table')),
-                'images': len(soup.find_all('img')),
-                'links': len(soup.find_all('a')),
-                'code_blocks': len(soup.find_all('pre'))
+                'paragraphs': counts['p'],
+                'lists': counts['ul'] + counts['ol'],
+                'tables': counts['table'],
+                'images': counts['img'],
+                'links': counts['a'],
+                'code_blocks': counts['pre']
             },
             'metadata': {
-                'has_meta_description': bool(soup.find('meta', {'name': 'description'})),
-                'has_meta_keywords': bool(soup.find('meta', {'name': 'keywords'})),
-                'has_favicon': bool(soup.find('link', rel='icon')),
-                'has_structured_data': bool(soup.find('script', {'type': 'application/ld+json'}))
+                'has_meta_description': ('meta', 'description') in head_index,
+                'has_meta_keywords': ('meta', 'keywords') in head_index,
+                'has_favicon': ('link', 'icon') in head_index,
+                'has_structured_data': ('script', 'application/ld+json') in head_index
             }
         }
 
         return structure
 
-    def _extract_confluence_page_id(self, html: str) -> Optional[str]:
-        soup = BeautifulSoup(html, 'html.parser')
-        meta_tags = soup.find_all('meta', {'name': 'ajs-page-id'})
-        return meta_tags[0].get('content') if meta_tags else None
+    def _extract_confluence_page_id(self, tree: lxml.html.HtmlElement) -> Optional[str]:
+        page_ids = tree.xpath('//meta[@name="ajs-page-id"]/@content')
+        return page_ids[0] if page_ids else None
 
-    def _extract_google_docs_metadata(self, soup: BeautifulSoup) -> str:
-        last_modified = soup.find('div', class_='docs-last-modified')
-        return last_modified.get_text(strip=True) if last_modified else None
+    def _extract_google_docs_metadata(self, tree: lxml.html.HtmlElement) -> str:
+        last_modified = _find_tag(tree, 'div', 'docs-last-modified')
+        return _text(last_modified) if last_modified is not None else None
 
-    def _extract_medium_reading_time(self, soup: BeautifulSoup) -> Optional[int]:
-        time_elem = soup.find('span', class_='readingTime')
-        if time_elem:
-            match = re.search(r'(\d+)', time_elem.get('title', ''))
+    def _extract_medium_reading_time(self, tree: lxml.html.HtmlElement) -> Optional[int]:
+        time_elem = _find_tag(tree, 'span', 'readingTime')
+        if time_elem is not None:
+            match = _FIRST_INT.search(time_elem.get('title', ''))
             return int(match.group(1)) if match else None
         return None
 
-    def _extract_medium_claps(self, soup: BeautifulSoup) -> Optional[int]:
-        claps_elem = soup.find('span', class_='js-postMetaLockup')
-        if claps_elem:
-            match = re.search(r'(\d+)', claps_elem.get_text())
+    def _extract_medium_claps(self, tree: lxml.html.HtmlElement) -> Optional[int]:
+        claps_elem = _find_tag(tree, 'span', 'js-postMetaLockup')
+        if claps_elem is not None:
+            match = _FIRST_INT.search(claps_elem.text_content())
             return int(match.group(1)) if match else None
         return None
 
-    def _determine_github_content_type(self, soup: BeautifulSoup) -> str:
+    def _determine_github_content_type(self, tree: lxml.html.HtmlElement) -> str:
         """Determine GitHub content type"""
-        if soup.find('article', class_='markdown-body'):
-            return 'readme'
-        elif soup.find('div', class_=['issue-header', 'gh-header-meta']):
-            return 'issue'
-        elif soup.find('div', class_=['pull-request-header', 'gh-header-meta']):
-            return 'pull_request'
-        return 'unknown'
+        return _github_content_type(tree)
 
-    def _extract_github_title(self, soup: BeautifulSoup, content_type: str) -> str:
+    def _extract_github_title(self, tree: lxml.html.HtmlElement, content_type: str) -> str:
         """Extract GitHub content title"""
         if content_type == 'readme':
-            h1 = soup.find('h1')
-            return h1.get_text(strip=True) if h1 else "README"
+            h1 = _find_tag(tree, 'h1')
+            return _text(h1) if h1 is not None else "README"
         else:
-            title_elem = soup.find('span', class_='js-issue-title')
-            return title_elem.get_text(strip=True) if title_elem else "Untitled"
+            title_elem = _find_tag(tree, 'span', 'js-issue-title')
+            return _text(title_elem) if title_elem is not None else "Untitled"
 
-    def _extract_github_metadata(self, soup: BeautifulSoup, content_type: str) -> Dict[str, Any]:
+    def _extract_github_metadata(self, tree: lxml.html.HtmlElement, content_type: str) -> Dict[str, Any]:
         """Extract GitHub-specific metadata"""
         metadata = {
             'content_type': content_type,
-            'repository': self._extract_repo_info(soup)
+            'repository': self._extract_repo_info(tree)
         }
 
         if content_type in ['issue', 'pull_request']:
             metadata.update({
-                'author': self._extract_github_author(soup),
-                'created_at': self._extract_github_timestamp(soup),
-                'labels': self._extract_github_labels(soup),
-                'status': self._extract_github_status(soup)
+                'author': self._extract_github_author(tree),
+                'created_at': self._extract_github_timestamp(tree),
+                'labels': self._extract_github_labels(tree),
+                'status': self._extract_github_status(tree)
             })
 
         return metadata
 
-    def _extract_repo_info(self, soup: BeautifulSoup) -> Dict[str, str]:
-        repo_elem = soup.find('a', class_='url fn')
-        if repo_elem:
+    def _extract_repo_info(self, tree: lxml.html.HtmlElement) -> Dict[str, str]:
+        repo_elem = _find_tag(tree, 'a', 'url fn')
+        if repo_elem is not None:
             return {
-                'name': repo_elem.get_text(strip=True),
+                'name': _text(repo_elem),
                 'url': repo_elem.get('href')
             }
         return {}
 
-    def _extract_github_author(self, soup: BeautifulSoup) -> Optional[str]:
-        author_elem = soup.find('a', class_='author')
-        return author_elem.get_text(strip=True) if author_elem else None
+    def _extract_github_author(self, tree: lxml.html.HtmlElement) -> Optional[str]:
+        author_elem = _find_tag(tree, 'a', 'author')
+        return _text(author_elem) if author_elem is not None else None
 
-    def _extract_github_timestamp(self, soup: BeautifulSoup) -> Optional[str]:
-        time_elem = soup.find('relative-time')
-        return time_elem.get('datetime') if time_elem else None
+    def _extract_github_timestamp(self, tree: lxml.html.HtmlElement) -> Optional[str]:
+        time_elem = _find_tag(tree, 'relative-time')
+        return time_elem.get('datetime') if time_elem is not None else None
 
-    def _extract_github_labels(self, soup: BeautifulSoup) -> List[str]:
+    def _extract_github_labels(self, tree: lxml.html.HtmlElement) -> List[str]:
         labels = []
-        for label in soup.find_all('a', class_='IssueLabel'):
-            labels.append(label.get_text(strip=True))
+        for label in tree.find_class('IssueLabel'):
+            if label.tag == 'a':
+                labels.append(_text(label))
         return labels
 
-    def _extract_github_status(self, soup: BeautifulSoup) -> Optional[str]:
-        status_elem = soup.find('span', class_=['State', 'IssueState'])
-        return status_elem.get_text(strip=True) if status_elem else None
+    def _extract_github_status(self, tree: lxml.html.HtmlElement) -> Optional[str]:
+        status_elem = _find_tag(tree, 'span', 'State', 'IssueState')
+        return _text(status_elem) if status_elem is not None else None
 
-    def _determine_gitlab_content_type(self, soup: BeautifulSoup) -> str:
+    def _determine_gitlab_content_type(self, tree: lxml.html.HtmlElement) -> str:
         """Determine GitLab content type"""
-        if soup.find('article', class_='markdown-body'):
+        if _find_tag(tree, 'article', 'markdown-body') is not None:
             return 'readme'
-        elif soup.find('div', class_=['issue-header', 'gh-header-meta']):
+        elif _find_tag(tree, 'div', 'issue-header', 'gh-header-meta') is not None:
             return 'issue'
-        elif soup.find('div', class_=['merge-request-header', 'gh-header-meta']):
+        elif _find_tag(tree, 'div', 'merge-request-header', 'gh-header-meta') is not None:
             return 'merge_request'
         return 'unknown'
 
-    def _extract_gitlab_title(self, soup: BeautifulSoup, content_type: str) -> str:
+    def _extract_gitlab_title(self, tree: lxml.html.HtmlElement, content_type: str) -> str:
         """Extract GitLab content title"""
         if content_type == 'readme':
-            h1 = soup.find('h1')
-            return h1.get_text(strip=True) if h1 else "README"
+            h1 = _find_tag(tree, 'h1')
+            return _text(h1) if h1 is not None else "README"
         else:
-            title_elem = soup.find('span', class_='js-issue-title')
-            return title_elem.get_text(strip=True) if title_elem else "Untitled"
+            title_elem = _find_tag(tree, 'span', 'js-issue-title')
+            return _text(title_elem) if title_elem is not None else "Untitled"
 
-    def _extract_gitlab_metadata(self, soup: BeautifulSoup, content_type: str) -> Dict[str, Any]:
+    def _extract_gitlab_metadata(self, tree: lxml.html.HtmlElement, content_type: str) -> Dict[str, Any]:
         """Extract GitLab-specific metadata"""
         metadata = {
             'content_type': content_type,
-            'repository': self._extract_repo_info(soup)
+            'repository': self._extract_repo_info(tree)
         }
 
         if content_type in ['issue', 'merge_request']:
             metadata.update({
-                'author': self._extract_github_author(soup),
-                'created_at': self._extract_github_timestamp(soup),
-                'labels': self._extract_github_labels(soup),
-                'status': self._extract_github_status(soup)
+                'author': self._extract_github_author(tree),
+                'created_at': self._extract_github_timestamp(tree),
+                'labels': self._extract_github_labels(tree),
+                'status': self._extract_github_status(tree)
             })
 
         return metadata
@@ -493,6 +524,6 @@ class URLProcessor(BaseProcessor):
             'source_type': source_type,
             'metadata': {
                 'error': 'Failed to parse content',
-                'timestamp': datetime.utcnow().isoformat()
+                'timestamp': _now_iso()
             }
         }
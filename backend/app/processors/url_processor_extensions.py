@@ -1,32 +1,37 @@
 from typing import Dict, Any, Optional, List
-from bs4 import BeautifulSoup
-import re
+import lxml.html
+from .html_utils import _cached_tree, _find_tag, _text, _render_blocks, _FIRST_INT, \
+    _github_content_type, _now_iso
+import io
 import logging
-from datetime import datetime
 
 class URLProcessorExtensions:
     @staticmethod
     async def _parse_google_docs(html: str) -> Dict[str, Any]:
         """Parse Google Docs content"""
         try:
-            soup = BeautifulSoup(html, 'html.parser')
+            tree = _cached_tree(html)
 
             # Extract content from Google Docs structure
-            content_elem = soup.find('div', class_='kix-appview-editor')
-            title = soup.find('div', class_='docs-title-input')
-
-            text_blocks = []
-            if content_elem:
-                for elem in content_elem.find_all(['p', 'h1', 'h2', 'h3', 'li']):
-                    text_blocks.append(elem.get_text(strip=True))
+            content_elem = _find_tag(tree, 'div', 'kix-appview-editor')
+            title = _find_tag(tree, 'div', 'docs-title-input')
+
+            text = io.StringIO()
+            blocks_count = 0
+            if content_elem is not None:
+                for elem in content_elem.iter('p', 'h1', 'h2', 'h3', 'li'):
+                    if blocks_count:
+                        text.write('\n\n')
+                    text.write(_text(elem))
+                    blocks_count += 1
 
             return {
-                'title': title.get_text(strip=True) if title else "Untitled Document",
-                'text': '\n\n'.join(text_blocks),
+                'title': _text(title) if title is not None else "Untitled Document",
+                'text': text.getvalue(),
                 'source_type': 'google_docs',
                 'metadata': {
-                    'blocks_count': len(text_blocks),
-                    'last_modified': URLProcessorExtensions._extract_google_docs_metadata(soup)
+                    'blocks_count': blocks_count,
+                    'last_modified': URLProcessorExtensions._extract_google_docs_metadata(tree)
                 }
             }
         except Exception as e:
@@ -37,34 +42,25 @@ class URLProcessorExtensions:
     async def _parse_medium(html: str) -> Dict[str, Any]:
         """Parse Medium article content"""
         try:
-            soup = BeautifulSoup(html, 'html.parser')
+            tree = _cached_tree(html)
 
             # Extract article content
-            article = soup.find('article')
-            title = soup.find('h1')
-            author = soup.find('meta', {'name': 'author'})
-
-            text_blocks = []
-            if article:
-                for elem in article.find_all(['p', 'h1', 'h2', 'h3', 'pre', 'blockquote']):
-                    if elem.name in ['h1', 'h2', 'h3']:
-                        level = int(elem.name[1])
-                        text_blocks.append(f"{'#' * level} {elem.get_text(strip=True)}")
-                    elif elem.name == 'pre':
-                        text_blocks.append(f"```\n{elem.get_text(strip=True)}\n```")
-                    elif elem.name == 'blockquote':
-                        text_blocks.append(f"> {elem.get_text(strip=True)}")
-                    else:
-                        text_blocks.append(elem.get_text(strip=True))
+            article = _find_tag(tree, 'article')
+            title = _find_tag(tree, 'h1')
+            author = tree.xpath('//meta[@name="author"]/@content')
+
+            text = ''
+            if article is not None:
+                text = _render_blocks(article, ('p', 'h1', 'h2', 'h3', 'pre', 'blockquote'))
 
             return {
-                'title': title.get_text(strip=True) if title else "Untitled Article",
-                'text': '\n\n'.join(text_blocks),
+                'title': _text(title) if title is not None else "Untitled Article",
+                'text': text,
                 'source_type': 'medium',
                 'metadata': {
-                    'author': author.get('content') if author else None,
-                    'reading_time': URLProcessorExtensions._extract_medium_reading_time(soup),
-                    'claps': URLProcessorExtensions._extract_medium_claps(soup)
+                    'author': author[0] if author else None,
+                    'reading_time': URLProcessorExtensions._extract_medium_reading_time(tree),
+                    'claps': URLProcessorExtensions._extract_medium_claps(tree)
                 }
             }
         except Exception as e:
@@ -75,73 +71,60 @@ class URLProcessorExtensions:
     async def _parse_github(html: str) -> Dict[str, Any]:
         """Parse GitHub content"""
         try:
-            soup = BeautifulSoup(html, 'html.parser')
+            tree = _cached_tree(html)
 
             # Detect content type (README, Issue, PR, etc.)
-            content_type = URLProcessorExtensions._determine_github_content_type(soup)
+            content_type = URLProcessorExtensions._determine_github_content_type(tree)
 
             content_elem = None
             if content_type == 'readme':
-                content_elem = soup.find('article', class_='markdown-body')
+                content_elem = _find_tag(tree, 'article', 'markdown-body')
             elif content_type in ['issue', 'pull_request']:
-                content_elem = soup.find('div', class_='comment-body')
-
-            text_blocks = []
-            if content_elem:
-                for elem in content_elem.find_all(['p', 'h1', 'h2', 'h3', 'pre', 'li']):
-                    if elem.name in ['h1', 'h2', 'h3']:
-                        level = int(elem.name[1])
-                        text_blocks.append(f"{'#' * level} {elem.get_text(strip=True)}")
-                    elif elem.name == 'pre':
-                        text_blocks.append(f"```\n{elem.get_text(strip=True)}\n```")
-                    else:
-                        text_blocks.append(elem.get_text(strip=True))
+                content_elem = _find_tag(tree, 'div', 'comment-body')
+
+            text = ''
+            if content_elem is not None:
+                text = _render_blocks(content_elem, ('p', 'h1', 'h2', 'h3', 'pre', 'li'))
 
             return {
-                'title': URLProcessorExtensions._extract_github_title(soup, content_type),
-                'text': '\n\n'.join(text_blocks),
+                'title': URLProcessorExtensions._extract_github_title(tree, content_type),
+                'text': text,
                 'source_type': f'github_{content_type}',
-                'metadata': URLProcessorExtensions._extract_github_metadata(soup, content_type)
+                'metadata': URLProcessorExtensions._extract_github_metadata(tree, content_type)
             }
         except Exception as e:
             logging.error(f"Error parsing GitHub content: {str(e)}")
             return URLProcessorExtensions._create_fallback_response("github")
 
     @staticmethod
-    def _determine_github_content_type(soup: BeautifulSoup) -> str:
+    def _determine_github_content_type(tree: lxml.html.HtmlElement) -> str:
         """Determine GitHub content type"""
-        if soup.find('article', class_='markdown-body'):
-            return 'readme'
-        elif soup.find('div', class_=['issue-header', 'gh-header-meta']):
-            return 'issue'
-        elif soup.find('div', class_=['pull-request-header', 'gh-header-meta']):
-            return 'pull_request'
-        return 'unknown'
+        return _github_content_type(tree)
 
     @staticmethod
-    def _extract_github_title(soup: BeautifulSoup, content_type: str) -> str:
+    def _extract_github_title(tree: lxml.html.HtmlElement, content_type: str) -> str:
         """Extract GitHub content title"""
         if content_type == 'readme':
-            h1 = soup.find('h1')
-            return h1.get_text(strip=True) if h1 else "README"
+            h1 = _find_tag(tree, 'h1')
+            return _text(h1) if h1 is not None else "README"
         else:
-            title_elem = soup.find('span', class_='js-issue-title')
-            return title_elem.get_text(strip=True) if title_elem else "Untitled"
+            title_elem = _find_tag(tree, 'span', 'js-issue-title')
+            return _text(title_elem) if title_elem is not None else "Untitled"
 
     @staticmethod
-    def _extract_github_metadata(soup: BeautifulSoup, content_type: str) -> Dict[str, Any]:
+    def _extract_github_metadata(tree: lxml.html.HtmlElement, content_type: str) -> Dict[str, Any]:
         """Extract GitHub-specific metadata"""
         metadata = {
             'content_type': content_type,
-            'repository': URLProcessorExtensions._extract_repo_info(soup)
+            'repository': URLProcessorExtensions._extract_repo_info(tree)
         }
 
         if content_type in ['issue', 'pull_request']:
             metadata.update({
-                'author': URLProcessorExtensions._extract_github_author(soup),
-                'created_at': URLProcessorExtensions._extract_github_timestamp(soup),
-                'labels': URLProcessorExtensions._extract_github_labels(soup),
-                'status': URLProcessorExtensions._extract_github_status(soup)
+                'author': URLProcessorExtensions._extract_github_author(tree),
+                'created_at': URLProcessorExtensions._extract_github_timestamp(tree),
+                'labels': URLProcessorExtensions._extract_github_labels(tree),
+                'status': URLProcessorExtensions._extract_github_status(tree)
             })
 
         return metadata
@@ -155,60 +138,61 @@ class URLProcessorExtensions:
             'source_type': source_type,
             'metadata': {
                 'error': 'Failed to parse content',
-                'timestamp': datetime.utcnow().isoformat()
+                'timestamp': _now_iso()
             }
         }
 
     # Helper methods for metadata extraction
     @staticmethod
-    def _extract_google_docs_metadata(soup: BeautifulSoup) -> str:
-        last_modified = soup.find('div', class_='docs-last-modified')
-        return last_modified.get_text(strip=True) if last_modified else None
+    def _extract_google_docs_metadata(tree: lxml.html.HtmlElement) -> str:
+        last_modified = _find_tag(tree, 'div', 'docs-last-modified')
+        return _text(last_modified) if last_modified is not None else None
 
     @staticmethod
-    def _extract_medium_reading_time(soup: BeautifulSoup) -> Optional[int]:
-        time_elem = soup.find('span', class_='readingTime')
-        if time_elem:
-            match = re.search(r'(\d+)', time_elem.get('title', ''))
+    def _extract_medium_reading_time(tree: lxml.html.HtmlElement) -> Optional[int]:
+        time_elem = _find_tag(tree, 'span', 'readingTime')
+        if time_elem is not None:
+            match = _FIRST_INT.search(time_elem.get('title', ''))
             return int(match.group(1)) if match else None
         return None
 
     @staticmethod
-    def _extract_medium_claps(soup: BeautifulSoup) -> Optional[int]:
-        claps_elem = soup.find('span', class_='js-postMetaLockup')
-        if claps_elem:
-            match = re.search(r'(\d+)', claps_elem.get_text())
+    def _extract_medium_claps(tree: lxml.html.HtmlElement) -> Optional[int]:
+        claps_elem = _find_tag(tree, 'span', 'js-postMetaLockup')
+        if claps_elem is not None:
+            match = _FIRST_INT.search(claps_elem.text_content())
             return int(match.group(1)) if match else None
         return None
 
     @staticmethod
-    def _extract_repo_info(soup: BeautifulSoup) -> Dict[str, str]:
-        repo_elem = soup.find('a', class_='url fn')
-        if repo_elem:
+    def _extract_repo_info(tree: lxml.html.HtmlElement) -> Dict[str, str]:
+        repo_elem = _find_tag(tree, 'a', 'url fn')
+        if repo_elem is not None:
             return {
-                'name': repo_elem.get_text(strip=True),
+                'name': _text(repo_elem),
                 'url': repo_elem.get('href')
             }
         return {}
 
     @staticmethod
-    def _extract_github_author(soup: BeautifulSoup) -> Optional[str]:
-        author_elem = soup.find('a', class_='author')
-        return author_elem.get_text(strip=True) if author_elem else None
+    def _extract_github_author(tree: lxml.html.HtmlElement) -> Optional[str]:
+        author_elem = _find_tag(tree, 'a', 'author')
+        return _text(author_elem) if author_elem is not None else None
 
     @staticmethod
-    def _extract_github_timestamp(soup: BeautifulSoup) -> Optional[str]:
-        time_elem = soup.find('relative-time')
-        return time_elem.get('datetime') if time_elem else None
+    def _extract_github_timestamp(tree: lxml.html.HtmlElement) -> Optional[str]:
+        time_elem = _find_tag(tree, 'relative-time')
+        return time_elem.get('datetime') if time_elem is not None else None
 
     @staticmethod
-    def _extract_github_labels(soup: BeautifulSoup) -> List[str]:
+    def _extract_github_labels(tree: lxml.html.HtmlElement) -> List[str]:
         labels = []
-        for label in soup.find_all('a', class_='IssueLabel'):
-            labels.append(label.get_text(strip=True))
+        for label in tree.find_class('IssueLabel'):
+            if label.tag == 'a':
+                labels.append(_text(label))
         return labels
 
     @staticmethod
-    def _extract_github_status(soup: BeautifulSoup) -> Optional[str]:
-        status_elem = soup.find('span', class_=['State', 'IssueState'])
-        return status_elem.get_text(strip=True) if status_elem else None
+    def _extract_github_status(tree: lxml.html.HtmlElement) -> Optional[str]:
+        status_elem = _find_tag(tree, 'span', 'State', 'IssueState')
+        return _text(status_elem) if status_elem is not None else None
@@ -1,44 +1,92 @@
 from typing import Dict, Any, Optional
 import aiohttp
-from bs4 import BeautifulSoup
+import asyncio
+import copy
+import os
+from concurrent.futures import ProcessPoolExecutor
+import io
+import lxml.html
+from lxml import etree
 from .base_processor import BaseProcessor
-from datetime import datetime
+from .html_utils import _cached_tree, _find_tag, _text, _joined_text, _now_iso
 from urllib.parse import urlparse
 import re
 
+# Worker processes for CPU-bound page parsing, created on first use
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_parse_pool() -> ProcessPoolExecutor:
+    global _parse_pool
+    if _parse_pool is None:
+        _parse_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _parse_pool
+
+def shutdown_parse_pool():
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+
+# Only absolute web links are collected; 'http' alone would also match e.g. 'httpfoo'
+_LINK_PREFIXES = ('http://', 'https://')
+
+# Notion block classes whose text is collected
+_NOTION_BLOCK_CLASSES = frozenset({
+    'notion-text-block',
+    'notion-header-block',
+    'notion-sub_header-block',
+    'notion-bulleted_list-block',
+    'notion-numbered_list-block'
+})
+
+# Platform dispatch on the parsed host; Notion takes precedence over Confluence
+_NOTION_HOST = re.compile(r'(?:^|\.)notion\.site$')
+_CONFLUENCE_HOST = re.compile(r'confluence|atlassian')
+
 class GenericURLProcessor(BaseProcessor):
+    _error_prefix = "URL processing failed"
+
     @property
     def content_type(self) -> str:
         return 'text/html'
 
     async def process_content(self, content: bytes) -> Dict[str, Any]:
         try:
-            soup = BeautifulSoup(content, 'html.parser')
-            metadata = self._extract_metadata(soup)
-            text_content, structure = self._extract_content(soup)
-
-            return {
-                'title': metadata['title'],
-                'text': text_content,
-                'metadata': metadata,
-                'structure': structure,
-                'success': True
-            }
+            # Parsing is CPU-bound; run it in a worker process to keep the event loop free
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_get_parse_pool(), _parse_sync, type(self).__name__, content)
         except Exception as e:
             return {
-                'error': f"URL processing failed: {str(e)}",
+                'error': f"{self._error_prefix}: {str(e)}",
                 'success': False
             }
 
-    def _extract_metadata(self, soup: BeautifulSoup) -> Dict[str, Any]:
+    @classmethod
+    def _parse(cls, content: bytes) -> Dict[str, Any]:
+        # Content extraction drops nav/script elements, so work on a copy of the shared tree
+        tree = copy.deepcopy(_cached_tree(content))
+        metadata = cls._extract_metadata(tree)
+        text_content, structure = cls._extract_content(tree)
+
+        return {
+            'title': metadata['title'],
+            'text': text_content,
+            'metadata': metadata,
+            'structure': structure,
+            'success': True
+        }
+
+    @staticmethod
+    def _extract_metadata(tree: lxml.html.HtmlElement) -> Dict[str, Any]:
+        title = tree.find('.//title')
         metadata = {
-            'title': soup.title.string if soup.title else "Untitled Page",
-            'timestamp': datetime.now().isoformat(),
+            'title': title.text if title is not None else "Untitled Page",
+            'timestamp': _now_iso(),
             'meta_tags': {}
         }
 
         # Extract meta tags
-        for meta in soup.find_all('meta'):
+        for meta in tree.iter('meta'):
             name = meta.get('name', meta.get('property', ''))
             content = meta.get('content', '')
             if name and content:
@@ -46,183 +94,277 @@ class GenericURLProcessor(BaseProcessor):
 
         return metadata
 
-    def _extract_content(self, soup: BeautifulSoup) -> tuple[str, Dict[str, Any]]:
+    @staticmethod
+    def _extract_content(tree: lxml.html.HtmlElement) -> tuple[str, Dict[str, Any]]:
         # Remove unwanted elements
-        for element in soup.find_all(['script', 'style', 'nav', 'footer']):
-            element.decompose()
+        for element in list(tree.iter('script', 'style', 'nav', 'footer')):
+            element.drop_tree()
 
         structure = {
             'headings': [],
             'links': [],
-            'images': len(soup.find_all('img')),
-            'paragraphs': len(soup.find_all('p'))
+            'images': 0,
+            'paragraphs': 0
         }
 
-        # Extract headings
-        for heading in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
-            structure['headings'].append({
-                'level': int(heading.name[1]),
-                'text': heading.get_text(strip=True)
-            })
-
-        # Extract links
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            if href.startswith(('http', 'https')):
-                structure['links'].append({
-                    'text': link.get_text(strip=True),
-                    'url': href
+        # Collect headings, links, images and paragraphs in one walk
+        for elem in tree.iter('h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'a', 'img', 'p'):
+            tag = elem.tag
+            if tag == 'p':
+                structure['paragraphs'] += 1
+            elif tag == 'img':
+                structure['images'] += 1
+            elif tag == 'a':
+                href = elem.get('href')
+                if href and href.startswith(_LINK_PREFIXES):
+                    structure['links'].append({
+                        'text': _text(elem),
+                        'url': href
+                    })
+            else:
+                structure['headings'].append({
+                    'level': int(tag[1]),
+                    'text': _text(elem)
                 })
 
-        main_content = soup.find('main') or soup.find('article') or \
-                      soup.find('div', {'class': ['content', 'main']}) or soup.body
+        main_content = _find_tag(tree, 'main')
+        if main_content is None:
+            main_content = _find_tag(tree, 'article')
+        if main_content is None:
+            main_content = _find_tag(tree, 'div', 'content', 'main')
+        if main_content is None:
+            main_content = tree.body
+        if main_content is None:
+            # Empty documents and bare fragments have no <body>
+            main_content = tree
 
-        return main_content.get_text(separator=' ', strip=True), structure
+        return _joined_text(main_content), structure
 
 class NotionProcessor(GenericURLProcessor):
+    _error_prefix = "Notion processing failed"
+
     @property
     def content_type(self) -> str:
         return 'application/notion'
 
-    async def process_content(self, content: bytes) -> Dict[str, Any]:
-        try:
-            soup = BeautifulSoup(content, 'html.parser')
-            metadata = self._extract_notion_metadata(soup)
-            text_content, structure = self._extract_notion_content(soup)
+    @classmethod
+    def _parse(cls, content: bytes) -> Dict[str, Any]:
+        metadata, structure, text_content = cls._collect(_cached_tree(content))
 
-            return {
-                'title': metadata['title'],
-                'text': text_content,
-                'metadata': metadata,
-                'structure': structure,
-                'success': True
-            }
-        except Exception as e:
-            return {
-                'error': f"Notion processing failed: {str(e)}",
-                'success': False
-            }
-
-    def _extract_notion_metadata(self, soup: BeautifulSoup) -> Dict[str, Any]:
-        metadata = self._extract_metadata(soup)
-        metadata['platform'] = 'notion'
-
-        # Extract Notion-specific metadata
-        title_elem = soup.find('div', {'class': 'notion-title'}) or \
-                    soup.find('h1', {'class': ['notion-header-block']})
-        metadata['title'] = title_elem.get_text(strip=True) if title_elem else "Untitled Notion Page"
-
-        return metadata
+        return {
+            'title': metadata['title'],
+            'text': text_content,
+            'metadata': metadata,
+            'structure': structure,
+            'success': True
+        }
 
-    def _extract_notion_content(self, soup: BeautifulSoup) -> tuple[str, Dict[str, Any]]:
+    @staticmethod
+    def _collect(tree: lxml.html.HtmlElement) -> tuple[Dict[str, Any], Dict[str, Any], str]:
+        """Collect metadata, structure and block text in a single walk over the page"""
         structure = {
             'blocks': [],
             'databases': [],
-            'images': len(soup.find_all('img')),
-            'code_blocks': len(soup.find_all('pre'))
+            'images': 0,
+            'code_blocks': 0
+        }
+
+        notion_title = header_title = None
+        meta_tags = {}
+        text_content = io.StringIO()
+        for _, elem in etree.iterwalk(tree, events=('start',)):
+            tag = elem.tag
+            if tag == 'img':
+                structure['images'] += 1
+            elif tag == 'pre':
+                structure['code_blocks'] += 1
+            elif tag == 'meta':
+                name = elem.get('name', elem.get('property', ''))
+                content = elem.get('content', '')
+                if name and content:
+                    meta_tags[name] = content
+            elif tag in ('div', 'p', 'h1'):
+                classes = (elem.get('class') or '').split()
+                if not classes:
+                    continue
+                if tag == 'h1':
+                    if header_title is None and 'notion-header-block' in classes:
+                        header_title = elem
+                    continue
+                if tag == 'div' and notion_title is None and 'notion-title' in classes:
+                    notion_title = elem
+                if _NOTION_BLOCK_CLASSES.isdisjoint(classes):
+                    continue
+                block_text = _text(elem)
+                if structure['blocks']:
+                    text_content.write(' ')
+                text_content.write(block_text)
+                structure['blocks'].append({
+                    'type': classes[0],
+                    'text': block_text
+                })
+
+        title_elem = notion_title if notion_title is not None else header_title
+        metadata = {
+            'title': _text(title_elem) if title_elem is not None else "Untitled Notion Page",
+            'timestamp': _now_iso(),
+            'meta_tags': meta_tags,
+            'platform': 'notion'
         }
 
-        content_blocks = soup.find_all(['div', 'p'], {'class': [
-            'notion-text-block',
-            'notion-header-block',
-            'notion-sub_header-block',
-            'notion-bulleted_list-block',
-            'notion-numbered_list-block'
-        ]})
-
-        text_content = []
-        for block in content_blocks:
-            block_text = block.get_text(strip=True)
-            text_content.append(block_text)
-            structure['blocks'].append({
-                'type': block.get('class', [''])[0],
-                'text': block_text
-            })
-
-        return ' '.join(text_content), structure
+        return metadata, structure, text_content.getvalue()
 
 class ConfluenceProcessor(GenericURLProcessor):
+    _error_prefix = "Confluence processing failed"
+
     @property
     def content_type(self) -> str:
         return 'application/confluence'
 
-    async def process_content(self, content: bytes) -> Dict[str, Any]:
-        try:
-            soup = BeautifulSoup(content, 'html.parser')
-            metadata = self._extract_confluence_metadata(soup)
-            text_content, structure = self._extract_confluence_content(soup)
+    @classmethod
+    def _parse(cls, content: bytes) -> Dict[str, Any]:
+        metadata, structure, text_content = cls._collect(_cached_tree(content))
 
-            return {
-                'title': metadata['title'],
-                'text': text_content,
-                'metadata': metadata,
-                'structure': structure,
-                'success': True
-            }
-        except Exception as e:
-            return {
-                'error': f"Confluence processing failed: {str(e)}",
-                'success': False
-            }
+        return {
+            'title': metadata['title'],
+            'text': text_content,
+            'metadata': metadata,
+            'structure': structure,
+            'success': True
+        }
 
-    def _extract_confluence_metadata(self, soup: BeautifulSoup) -> Dict[str, Any]:
-        metadata = self._extract_metadata(soup)
-        metadata['platform'] = 'confluence'
+    @staticmethod
+    def _collect(tree: lxml.html.HtmlElement) -> tuple[Dict[str, Any], Dict[str, Any], str]:
+        """Collect metadata, structure and main-content text in a single walk over the page"""
+        main_content = next(iter(tree.xpath('//div[@id="main-content"]')), None)
+        if main_content is None:
+            main_content = next(iter(tree.xpath('//div[@id="content"]')), None)
 
-        # Extract Confluence-specific metadata
-        title_elem = soup.find('h1', {'id': 'title-text'}) or soup.find('title')
-        metadata['title'] = title_elem.get_text(strip=True) if title_elem else "Untitled Confluence Page"
+        if main_content is None:
+            raise ValueError("Could not find main content in Confluence page")
+
+        structure = {
+            'sections': [],
+            'attachments': [],
+            'comments': 0,
+            'tables': 0
+        }
+
+        # Navigation and other unwanted divs inside the main content are skipped
+        # (tail text included, like drop_tree) rather than removed from the shared tree
+        unwanted = {'navigation', 'header', 'footer'}
+        page_title = heading_title = page_info = skipped = None
+        in_main = False
+        meta_tags = {}
+        text_content = io.StringIO()
+
+        def add_text(value: Optional[str]) -> None:
+            value = value.strip() if value else ''
+            if value:
+                if text_content.tell():
+                    text_content.write(' ')
+                text_content.write(value)
+
+        for event, elem in etree.iterwalk(tree, events=('start', 'end', 'comment')):
+            if event == 'end':
+                if elem is main_content:
+                    in_main = False
+                elif in_main:
+                    if elem is skipped:
+                        skipped = None
+                    if skipped is None:
+                        add_text(elem.tail)
+                continue
+            if event == 'comment':
+                if in_main and skipped is None:
+                    add_text(elem.tail)
+                continue
+
+            if elem is main_content:
+                in_main = True
+            tag = elem.tag
+
+            # Page metadata is read from the whole page, skipped divs included
+            if tag == 'meta':
+                name = elem.get('name', elem.get('property', ''))
+                content = elem.get('content', '')
+                if name and content:
+                    meta_tags[name] = content
+            elif tag == 'title':
+                if page_title is None:
+                    page_title = elem
+            elif tag == 'h1' and heading_title is None and elem.get('id') == 'title-text':
+                heading_title = elem
+
+            if tag == 'div':
+                classes = (elem.get('class') or '').split()
+                if page_info is None and 'page-metadata' in classes:
+                    page_info = elem
+                if skipped is None and in_main and elem is not main_content and not unwanted.isdisjoint(classes):
+                    skipped = elem
+                if skipped is not None:
+                    continue
+                if 'comment' in classes:
+                    structure['comments'] += 1
+                if in_main and 'attachment' in classes:
+                    structure['attachments'].append({
+                        'name': elem.get('data-attachment-name', ''),
+                        'type': elem.get('data-attachment-type', '')
+                    })
+            elif skipped is not None:
+                continue
+            elif tag == 'table':
+                structure['tables'] += 1
+            elif in_main and tag in ('h1', 'h2', 'h3', 'h4', 'h5', 'h6'):
+                structure['sections'].append({
+                    'level': int(tag[1]),
+                    'title': _text(elem)
+                })
+
+            if in_main:
+                add_text(elem.text)
+
+        title_elem = heading_title if heading_title is not None else page_title
+        metadata = {
+            'title': _text(title_elem) if title_elem is not None else "Untitled Confluence Page",
+            'timestamp': _now_iso(),
+            'meta_tags': meta_tags,
+            'platform': 'confluence'
+        }
 
         # Extract page info
-        page_info = soup.find('div', {'class': 'page-metadata'})
-        if page_info:
+        if page_info is not None:
             metadata['page_info'] = {
                 'last_modified': page_info.get('data-last-modified', ''),
                 'version': page_info.get('data-version-number', ''),
                 'creator': page_info.get('data-creator-name', '')
             }
 
-        return metadata
-
-    def _extract_confluence_content(self, soup: BeautifulSoup) -> tuple[str, Dict[str, Any]]:
-        main_content = soup.find('div', {'id': 'main-content'}) or \
-                      soup.find('div', {'id': 'content'})
-
-        if not main_content:
-            raise ValueError("Could not find main content in Confluence page")
-
-        # Remove navigation and other unwanted elements
-        for element in main_content.find_all(['div'], {'class': ['navigation', 'header', 'footer']}):
-            element.decompose()
-
-        structure = {
-            'sections': [],
-            'attachments': [],
-            'comments': len(soup.find_all('div', {'class': 'comment'})),
-            'tables': len(soup.find_all('table'))
-        }
+        return metadata, structure, text_content.getvalue()
 
-        # Extract sections
-        for section in main_content.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
-            structure['sections'].append({
-                'level': int(section.name[1]),
-                'title': section.get_text(strip=True)
-            })
+_PARSERS = {cls.__name__: cls for cls in (GenericURLProcessor, NotionProcessor, ConfluenceProcessor)}
 
-        # Extract attachments
-        for attachment in main_content.find_all('div', {'class': 'attachment'}):
-            structure['attachments'].append({
-                'name': attachment.get('data-attachment-name', ''),
-                'type': attachment.get('data-attachment-type', '')
-            })
+def _parse_sync(processor_name: str, content: bytes) -> Dict[str, Any]:
+    """Worker-process entry point; picklable, looks the processor class up by name"""
+    return _PARSERS[processor_name]._parse(content)
 
-        return main_content.get_text(separator=' ', strip=True), structure
+def _url_platform(url: str) -> Optional[str]:
+    """'notion' or 'confluence' for a known platform URL, otherwise None"""
+    parsed = urlparse(url)
+    host = (parsed.hostname or '').lower()
+    if _NOTION_HOST.search(host):
+        return 'notion'
+    # Self-hosted Confluence is often served under a /confluence context path
+    if _CONFLUENCE_HOST.search(host) or parsed.path.lower().startswith('/confluence'):
+        return 'confluence'
+    return None
 
 def get_url_processor(url: str, mongodb_client) -> BaseProcessor:
     """Factory function to get the appropriate processor for a URL"""
-    if 'notion.site' in url:
+    platform = _url_platform(url)
+    if platform == 'notion':
         return NotionProcessor(mongodb_client)
-    elif any(x in url for x in ['confluence', 'atlassian']):
+    elif platform == 'confluence':
         return ConfluenceProcessor(mongodb_client)
     else:
         return GenericURLProcessor(mongodb_client)
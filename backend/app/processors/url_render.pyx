@@ -0,0 +1,22 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""Compiled markdown-style rendering of (tag, text) blocks; see html_utils._format_blocks"""
+
+cpdef list format_blocks(list blocks):
+    """Format (tag, text) pairs into markdown-style strings"""
+    cdef list out = []
+    cdef str tag
+    cdef str text
+    for tag, text in blocks:
+        if tag == 'h1':
+            out.append('# ' + text)
+        elif tag == 'h2':
+            out.append('## ' + text)
+        elif tag == 'h3':
+            out.append('### ' + text)
+        elif tag == 'pre':
+            out.append('```\n' + text + '\n```')
+        elif tag == 'blockquote':
+            out.append('> ' + text)
+        else:
+            out.append(text)
+    return out
@@ -1,39 +1,62 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, WebSocket
 from typing import Optional, List, Dict, Any
 from ..processors.document_processor_factory import DocumentProcessorFactory
+import asyncio
 import json
+import orjson
 from datetime import datetime
 import os
 
 router = APIRouter()
 websocket_connections: List[WebSocket] = []
 
+def _dumps(payload: Dict[str, Any]) -> str:
+    # orjson encodes to UTF-8 bytes; decoded so clients keep receiving text frames
+    return orjson.dumps(payload).decode()
+
+async def _broadcast(payload: Dict[str, Any], exclude: Optional[WebSocket] = None):
+    """Send payload to all connections concurrently, dropping the ones that fail"""
+    targets = [c for c in websocket_connections if c is not exclude]
+    data = _dumps(payload)
+    results = await asyncio.gather(
+        *(c.send_text(data) for c in targets),
+        return_exceptions=True
+    )
+    for connection, result in zip(targets, results):
+        if isinstance(result, Exception) and connection in websocket_connections:
+            websocket_connections.remove(connection)
+
 @router.post("/upload/file")
 async def upload_file(
     file: UploadFile = File(...),
     metadata: Optional[str] = Form(None)
 ):
     try:
-        content = await file.read()
         file_ext = os.path.splitext(file.filename)[1].lower()
         processor = DocumentProcessorFactory.get_processor_for_extension(file_ext)
 
+        # Stream-capable processors read the spooled upload directly, without a bytes copy
+        if processor.accepts_stream:
+            await file.seek(0)
+            content = file.file
+        else:
+            content = await file.read()
+
         meta_dict = json.loads(metadata) if metadata else {}
         meta_dict['original_filename'] = file.filename
 
         result = await processor.process_content(content, meta_dict)
 
         # Notify connected clients about new document
-        for connection in websocket_connections:
-            await connection.send_json({
-                "type": "document_update",
-                "document": {
-                    "id": result['document_id'],
-                    "filename": file.filename,
-                    "type": file_ext[1:],  # Remove the dot
-                    "timestamp": datetime.now().isoformat()
-                }
-            })
+        await _broadcast({
+            "type": "document_update",
+            "document": {
+                "id": result['document_id'],
+                "filename": file.filename,
+                "type": file_ext[1:],  # Remove the dot
+                "timestamp": datetime.now().isoformat()
+            }
+        })
 
         return result
     except ValueError as ve:
@@ -84,7 +107,7 @@ async def websocket_endpoint(websocket: WebSocket):
     try:
         while True:
             data = await websocket.receive_text()
-            message = json.loads(data)
+            message = orjson.loads(data)
 
             if message.get("type") == "preview_request":
                 try:
@@ -99,38 +122,36 @@ async def websocket_endpoint(websocket: WebSocket):
                         node_data.get("metadata", {})
                     )
 
-                    await websocket.send_json({
+                    await websocket.send_text(_dumps({
                         "type": "preview_updated" if preview_result["status"] == "success" else "preview_error",
                         "nodeId": node_id,
                         "preview": preview_result.get("data"),
                         "error": preview_result.get("error")
-                    })
+                    }))
 
                 except Exception as e:
-                    await websocket.send_json({
+                    await websocket.send_text(_dumps({
                         "type": "preview_error",
                         "nodeId": message["payload"]["nodeId"],
                         "error": str(e)
-                    })
+                    }))
 
             elif message.get("type") == "search":
                 results = await document_processor.search_documents(
                     message["query"],
                     message.get("limit", 5)
                 )
-                await websocket.send_json({
+                await websocket.send_text(_dumps({
                     "type": "search_results",
                     "results": results
-                })
+                }))
 
             elif message.get("type") == "node_update":
                 # Broadcast node updates to all connected clients except sender
-                for connection in websocket_connections:
-                    if connection != websocket:
-                        await connection.send_json({
-                            "type": "node_update",
-                            "node": message["node"]
-                        })
+                await _broadcast({
+                    "type": "node_update",
+                    "node": message["node"]
+                }, exclude=websocket)
 
     except Exception as e:
         print(f"WebSocket error: {e}")
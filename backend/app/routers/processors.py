@@ -1,6 +1,9 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Depends
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Depends, Body, Request
 from motor.motor_asyncio import AsyncIOMotorClient
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
+from urllib.parse import urlparse
+import aiohttp
+import asyncio
 import mimetypes
 from ..processors.document_processors import get_processor_for_content_type
 from ..processors.integration_processors import get_integration_processor
@@ -8,12 +11,44 @@ from ..vector_store import VectorStore
 
 router = APIRouter()
 
-async def get_mongodb():
-    client = AsyncIOMotorClient("mongodb://localhost:27017")
-    try:
-        yield client
-    finally:
-        client.close()
+# Batch URL processing limits
+_BATCH_PARALLELISM = 16
+_DOMAIN_MIN_INTERVAL = 0.25  # seconds between request starts to the same host
+
+# Shared HTTP connection pool, created on first use inside the event loop
+_http: Optional[aiohttp.ClientSession] = None
+
+def _get_http() -> aiohttp.ClientSession:
+    global _http
+    if _http is None or _http.closed:
+        _http = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=64, limit_per_host=4)
+        )
+    return _http
+
+async def close_http_session():
+    """Close the shared HTTP pool; called from the app's shutdown handler"""
+    if _http is not None and not _http.closed:
+        await _http.close()
+
+class DomainRateLimiter:
+    """Spaces out request starts to the same host by at least min_interval seconds"""
+
+    def __init__(self, min_interval: float = _DOMAIN_MIN_INTERVAL):
+        self.min_interval = min_interval
+        self._next_slot: Dict[str, float] = {}
+
+    async def wait(self, host: str) -> None:
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+def get_mongodb(request: Request) -> AsyncIOMotorClient:
+    # Motor clients are connection pools; reuse the app-scoped one
+    return request.app.state.mongodb
 
 @router.post("/process/document")
 async def process_document(
@@ -26,7 +61,13 @@ async def process_document(
             raise HTTPException(status_code=400, detail="Could not determine file type")
 
         processor = get_processor_for_content_type(content_type, mongodb)
-        content = await file.read()
+
+        # Stream-capable processors read the spooled upload directly, without a bytes copy
+        if processor.accepts_stream:
+            await file.seek(0)
+            content = file.file
+        else:
+            content = await file.read()
 
         # Process document and store with vector embedding
         document = await processor.process_and_store(
@@ -68,6 +109,41 @@ async def process_url(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/process/urls")
+async def process_urls(
+    urls: List[str] = Body(..., embed=True),
+    mongodb: AsyncIOMotorClient = Depends(get_mongodb)
+):
+    """Fetch and process several URLs concurrently; failures are reported per URL"""
+    semaphore = asyncio.Semaphore(_BATCH_PARALLELISM)
+    limiter = DomainRateLimiter()
+    session = _get_http()
+
+    async def process_one(url: str) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                processor = get_integration_processor(url, mongodb)
+
+                await limiter.wait(urlparse(url).hostname or '')
+                async with session.get(url) as response:
+                    if response.status != 200:
+                        return {"url": url, "status": "error", "detail": "Failed to fetch URL content"}
+                    content = await response.read()
+
+                document = await processor.process_and_store(
+                    content,
+                    {"source_url": url, "content_type": processor.content_type}
+                )
+                return {"url": url, "status": "success", "document": document}
+            except Exception as e:
+                return {"url": url, "status": "error", "detail": str(e)}
+
+    results = await asyncio.gather(*[process_one(url) for url in urls])
+    return {
+        "status": "success",
+        "results": results
+    }
+
 @router.get("/search")
 async def search_documents(
     query: str,
@@ -2,11 +2,11 @@ from fastapi import APIRouter, Depends, HTTPException
 from typing import List, Dict, Any
 from ..vector_search import VectorSearch
 from motor.motor_asyncio import AsyncIOMotorClient
-from ..websocket_manager import WebSocketManager
+# Shared manager; main.py starts and stops its cleanup loop
+from ..websocket_manager import manager as ws_manager
 from pydantic import BaseModel
 
 router = APIRouter()
-ws_manager = WebSocketManager()
 
 class SearchQuery(BaseModel):
     query: str
@@ -1,37 +1,47 @@
 from fastapi import APIRouter, HTTPException, WebSocket, Depends
-from typing import Dict, List
+from typing import Dict, List, Optional
+from uuid import uuid4
 from ..processors.url_processor import URLProcessor
 from ..mongodb import MongoDB
-from ..websocket_manager import WebSocketManager
+# Shared manager; main.py starts and stops its cleanup loop
+from ..websocket_manager import manager as ws_manager
 import json
+import orjson
 
 router = APIRouter()
-ws_manager = WebSocketManager()
+
+# Motor clients are connection pools; one is shared by every request
+_mongodb: Optional[MongoDB] = None
+
+def _get_mongo() -> MongoDB:
+    global _mongodb
+    if _mongodb is None:
+        _mongodb = MongoDB()
+    return _mongodb
 
 async def get_url_processor():
-    mongodb = MongoDB()
-    return URLProcessor(mongodb.client)
+    return URLProcessor(_get_mongo().client)
 
 @router.post("/process")
 async def process_url(url: str, processor: URLProcessor = Depends(get_url_processor)):
     try:
         # Notify connected clients about processing start
-        await ws_manager.broadcast({
+        await ws_manager.broadcast_json_bytes(orjson.dumps({
             "type": "url_processing",
             "status": "started",
             "url": url
-        })
+        }))
 
         # Process the URL
         document = await processor.process_url(url)
 
         # Notify connected clients about processing completion
-        await ws_manager.broadcast({
+        await ws_manager.broadcast_json_bytes(orjson.dumps({
             "type": "url_processing",
             "status": "completed",
             "url": url,
             "document_id": str(document.get("_id"))
-        })
+        }))
 
         return {
             "status": "success",
@@ -41,17 +51,19 @@ async def process_url(url: str, processor: URLProcessor = Depends(get_url_proces
         }
     except Exception as e:
         # Notify connected clients about processing failure
-        await ws_manager.broadcast({
+        await ws_manager.broadcast_json_bytes(orjson.dumps({
             "type": "url_processing",
             "status": "failed",
             "url": url,
             "error": str(e)
-        })
+        }))
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.websocket("/ws/url-processing")
 async def websocket_endpoint(websocket: WebSocket):
-    await ws_manager.connect(websocket)
+    # The manager keys queues and groups by client id; this endpoint has none of its own
+    client_id = uuid4().hex
+    await ws_manager.connect(websocket, client_id)
     try:
         while True:
             data = await websocket.receive_text()
@@ -59,19 +71,19 @@ async def websocket_endpoint(websocket: WebSocket):
                 message = json.loads(data)
                 if message.get("type") == "url_status":
                     # Handle status requests
-                    await websocket.send_json({
+                    await websocket.send_text(orjson.dumps({
                         "type": "url_status_response",
                         "status": "active"
-                    })
+                    }).decode())
             except json.JSONDecodeError:
-                await websocket.send_json({
+                await websocket.send_text(orjson.dumps({
                     "type": "error",
                     "message": "Invalid JSON message"
-                })
+                }).decode())
     except Exception as e:
         print(f"WebSocket error: {e}")
     finally:
-        await ws_manager.disconnect(websocket)
+        ws_manager.disconnect(client_id)
 
 @router.get("/sources")
 async def get_processed_sources(processor: URLProcessor = Depends(get_url_processor)):
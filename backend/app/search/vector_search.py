@@ -1,40 +1,87 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict
+import asyncio
 import numpy as np
-from sentence_transformers import SentenceTransformer
 import torch
+from bson import Binary
 from ..database.mongodb import MongoDBManager
+from ..embedding_models import get_model
+import contextlib
 import logging
+import re
 from datetime import datetime
 
+try:
+    # SIMD Hamming and int8 dot kernels; without it the float32 matrix is scanned directly
+    import simsimd
+except ImportError:
+    simsimd = None
+
+def quantize(embeddings: np.ndarray) -> np.ndarray:
+    """Int8 scalar quantization of unit-length embeddings"""
+    return np.clip(np.rint(embeddings * 127), -127, 127).astype(np.int8)
+
+def binarize(embeddings: np.ndarray) -> np.ndarray:
+    """Sign bits of each embedding, packed 8 dimensions per byte"""
+    return np.packbits(embeddings > 0, axis=-1)
+
 class VectorSearch:
     def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
         """Initialize vector search with specified model"""
-        self.model = SentenceTransformer(model_name)
         self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        self.model.to(self.device)
+        # Quantized ONNX only pays off on CPU; GPUs keep the PyTorch model
+        self.model = get_model(model_name, use_onnx=self.device == 'cpu')
+        self.dtype = torch.float32
+        if self.device != 'cpu':
+            # Half-precision weights on GPU; bfloat16 where supported avoids fp16 overflow
+            self.dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+            self.model.to(self.device, dtype=self.dtype)
         self.db_manager = MongoDBManager()
         self.similarity_threshold = 0.6
-        self.batch_size = 32
+        self.batch_size = 64
+        # Each coarse stage (Hamming, then int8) keeps this many documents per document of the next stage
+        self.rescore_factor = 4
+        # Stacked chunk-embedding matrices per search filter with the index version they were built from;
+        # dropped on local index writes and rebuilt when another worker changes the version
+        self._matrix_cache: "OrderedDict[str, Tuple[Tuple[int, Optional[str]], Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, List[Dict[str, Any]]]]]" = OrderedDict()
+        self._matrix_cache_size = 8
         logging.info(f"Initialized VectorSearch with model {model_name} on {self.device}")
 
     async def generate_embeddings(self, texts: List[str]) -> np.ndarray:
         """Generate embeddings for input texts"""
         try:
-            embeddings = []
-            for i in range(0, len(texts), self.batch_size):
-                batch = texts[i:i + self.batch_size]
-                with torch.no_grad():
+            if not texts:
+                return np.array([])
+
+            # Batch texts of similar length together so each batch pads as little as possible
+            order = np.argsort([len(text) for text in texts], kind='stable')
+            embeddings = None
+            for i in range(0, len(order), self.batch_size):
+                batch_idx = order[i:i + self.batch_size]
+                with torch.no_grad(), self._autocast():
                     batch_embeddings = self.model.encode(
-                        batch,
-                        convert_to_tensor=True,
-                        device=self.device
+                        [texts[j] for j in batch_idx],
+                        batch_size=self.batch_size,
+                        convert_to_numpy=True,
+                        show_progress_bar=False,
+                        device=self.device,
+                        normalize_embeddings=True
                     )
-                    embeddings.extend(batch_embeddings.cpu().numpy())
-            return np.array(embeddings)
+                if embeddings is None:
+                    # Stored and searched as float32 whatever precision the model ran in
+                    embeddings = np.empty((len(texts), batch_embeddings.shape[1]), dtype=np.float32)
+                embeddings[batch_idx] = batch_embeddings
+            return embeddings
         except Exception as e:
             logging.error(f"Error generating embeddings: {str(e)}")
             raise
 
+    def _autocast(self):
+        """Autocast context for GPU encoding, so stray float32 ops also run in half precision"""
+        if self.device == 'cpu':
+            return contextlib.nullcontext()
+        return torch.autocast(device_type=self.device, dtype=self.dtype)
+
     async def index_document(self, doc_id: str, content: str, metadata: Dict[str, Any]) -> bool:
         """Index document content with embeddings"""
         try:
@@ -45,26 +92,47 @@ class VectorSearch:
             document_data = {
                 'document_id': doc_id,
                 'chunks': chunks,
-                'embeddings': chunk_embeddings.tolist(),
+                'embeddings': Binary(chunk_embeddings.astype(np.float32, copy=False).tobytes()),
+                'embeddings_i8': Binary(quantize(chunk_embeddings).tobytes()),
+                'embeddings_bits': Binary(binarize(chunk_embeddings).tobytes()),
+                'dim': chunk_embeddings.shape[-1],
                 'metadata': metadata,
                 'indexed_at': datetime.utcnow().isoformat(),
                 'chunk_count': len(chunks)
             }
 
-            return await self.db_manager.update_document_vectors(doc_id, document_data)
+            updated = await self.db_manager.update_document_vectors(doc_id, document_data)
+            self._matrix_cache.clear()
+            return updated
         except Exception as e:
             logging.error(f"Error indexing document {doc_id}: {str(e)}")
             raise
 
-    def _chunk_content(self, content: str, chunk_size: int = 512) -> List[str]:
-        """Split content into overlapping chunks"""
-        words = content.split()
-        chunks = []
-        overlap = 50  # Words of overlap between chunks
+    def _chunk_content(self, content: str, chunk_size: Optional[int] = None) -> List[str]:
+        """Split content into overlapping chunks of at most chunk_size tokens"""
+        if chunk_size is None:
+            # Fill the encoder's window, leaving room for the special tokens
+            chunk_size = self.model.max_seq_length - 2
+        overlap = min(50, chunk_size // 4)  # Tokens of overlap between chunks
 
-        for i in range(0, len(words), chunk_size - overlap):
-            chunk = ' '.join(words[i:i + chunk_size])
-            chunks.append(chunk)
+        # Character spans of each token; chunks are slices of content, not rejoined tokens
+        tokenizer = self.model.tokenizer
+        if getattr(tokenizer, 'is_fast', False):
+            spans = tokenizer(
+                content,
+                add_special_tokens=False,
+                return_offsets_mapping=True,
+                verbose=False
+            )['offset_mapping']
+        else:
+            spans = [match.span() for match in re.finditer(r'\S+', content)]
+
+        chunks = []
+        for i in range(0, len(spans), chunk_size - overlap):
+            window = spans[i:i + chunk_size]
+            chunks.append(content[window[0][0]:window[-1][1]])
+            if i + chunk_size >= len(spans):
+                break
 
         return chunks
 
@@ -77,47 +145,165 @@ class VectorSearch:
         """Search for similar documents using vector similarity"""
         try:
             query_embedding = await self.generate_embeddings([query])
-            documents = await self.db_manager.get_documents_with_vectors(filters)
+            matrix, matrix_i8, matrix_bits, offsets, documents = await self._get_matrix(filters)
+            if not documents:
+                return []
+            query_array = query_embedding[0].astype(np.float32)
+
+            shortlist_size = self.rescore_factor * limit
+            if simsimd is not None and len(documents) > shortlist_size:
+                # Hamming distance over sign bits of every chunk, then int8 dot products over the
+                # survivors, narrow the documents whose chunks are scored in float32
+                hamming = np.asarray(simsimd.cdist(
+                    binarize(query_array)[None, :], matrix_bits, metric='hamming', dtype='bin8'
+                ))[0]
+                doc_ids = self._shortlist(-hamming, offsets, np.arange(len(documents)), self.rescore_factor * shortlist_size)
+                rows, doc_offsets = self._chunk_rows(offsets, doc_ids)
+                coarse = np.asarray(simsimd.cdist(quantize(query_array)[None, :], matrix_i8[rows], metric='dot'))[0]
+                doc_ids = self._shortlist(coarse, doc_offsets, doc_ids, shortlist_size)
+                rows, doc_offsets = self._chunk_rows(offsets, doc_ids)
+                similarities = matrix[rows] @ query_array
+            else:
+                # One GEMV over every chunk
+                doc_ids = np.arange(len(documents))
+                doc_offsets = offsets
+                similarities = matrix @ query_array
+            # Best chunk score per document
+            max_similarities = np.maximum.reduceat(similarities, doc_offsets[:-1])
+
+            candidates = np.flatnonzero(max_similarities >= self.similarity_threshold)
+            if len(candidates) > limit:
+                candidates = candidates[np.argpartition(max_similarities[candidates], -limit)[-limit:]]
+            candidates = candidates[np.argsort(-max_similarities[candidates], kind='stable')]
+
+            # Chunk text is not cached with the matrix; fetch only each hit's best chunk
+            hits = [documents[doc_ids[i]] for i in candidates]
+            contents = await asyncio.gather(*(
+                self.db_manager.get_chunk(
+                    doc['document_id'],
+                    int(np.argmax(similarities[doc_offsets[i]:doc_offsets[i + 1]]))
+                )
+                for doc, i in zip(hits, candidates)
+            ))
 
             results = []
-            for doc in documents:
-                doc_embeddings = np.array(doc['embeddings'])
-                # Calculate similarities with all chunks
-                similarities = np.dot(doc_embeddings, query_embedding[0])
-                max_similarity = float(np.max(similarities))
-
-                if max_similarity >= self.similarity_threshold:
-                    best_chunk_idx = int(np.argmax(similarities))
-                    results.append({
-                        'document_id': doc['document_id'],
-                        'similarity': max_similarity,
-                        'content': doc['chunks'][best_chunk_idx],
-                        'metadata': doc['metadata']
-                    })
-
-            results.sort(key=lambda x: x['similarity'], reverse=True)
-            return results[:limit]
+            for doc, i, content in zip(hits, candidates, contents):
+                results.append({
+                    'document_id': doc['document_id'],
+                    'similarity': float(max_similarities[i]),
+                    'content': content,
+                    'metadata': doc['metadata']
+                })
+
+            return results
         except Exception as e:
             logging.error(f"Error performing search: {str(e)}")
             raise
 
+    async def _get_matrix(
+        self,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, List[Dict[str, Any]]]:
+        """Return (chunk matrix, its int8 and sign-bit forms, per-document chunk offsets, documents) for the filter"""
+        key = repr(sorted(filters.items())) if filters else ''
+        version = await self.db_manager.get_vectors_version(filters)
+        cached = self._matrix_cache.get(key)
+        if cached is not None and cached[0] == version:
+            self._matrix_cache.move_to_end(key)
+            return cached[1]
+
+        documents = await self.db_manager.get_documents_with_vectors(filters)
+        documents = [doc for doc in documents if doc.get('embeddings')]
+        blocks = [self._embedding_rows(doc) for doc in documents]
+        if blocks:
+            matrix = np.ascontiguousarray(np.concatenate(blocks))
+            matrix_i8 = np.ascontiguousarray(np.concatenate(
+                [self._quantized_rows(doc, block) for doc, block in zip(documents, blocks)]
+            ))
+            matrix_bits = np.ascontiguousarray(np.concatenate(
+                [self._binary_rows(doc, block) for doc, block in zip(documents, blocks)]
+            ))
+        else:
+            matrix = np.empty((0, 0), dtype=np.float32)
+            matrix_i8 = np.empty((0, 0), dtype=np.int8)
+            matrix_bits = np.empty((0, 0), dtype=np.uint8)
+        offsets = np.zeros(len(documents) + 1, dtype=np.intp)
+        np.cumsum([len(block) for block in blocks], out=offsets[1:])
+
+        self._matrix_cache[key] = (version, (matrix, matrix_i8, matrix_bits, offsets, documents))
+        if len(self._matrix_cache) > self._matrix_cache_size:
+            self._matrix_cache.popitem(last=False)
+        return matrix, matrix_i8, matrix_bits, offsets, documents
+
+    @staticmethod
+    def _shortlist(scores: np.ndarray, doc_offsets: np.ndarray, doc_ids: np.ndarray, size: int) -> np.ndarray:
+        """Ids of the size documents whose best chunk score is highest"""
+        if len(doc_ids) <= size:
+            return doc_ids
+        best = np.maximum.reduceat(scores, doc_offsets[:-1])
+        return doc_ids[np.argpartition(best, -size)[-size:]]
+
+    @staticmethod
+    def _chunk_rows(offsets: np.ndarray, doc_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Matrix rows holding the chunks of doc_ids, and per-document offsets into those rows"""
+        lengths = offsets[doc_ids + 1] - offsets[doc_ids]
+        doc_offsets = np.zeros(len(doc_ids) + 1, dtype=np.intp)
+        np.cumsum(lengths, out=doc_offsets[1:])
+        rows = np.arange(doc_offsets[-1]) + np.repeat(offsets[doc_ids] - doc_offsets[:-1], lengths)
+        return rows, doc_offsets
+
+    @staticmethod
+    def _embedding_rows(doc: Dict[str, Any]) -> np.ndarray:
+        """Chunk embeddings of an indexed document as a (chunks, dim) float32 array"""
+        embeddings = doc['embeddings']
+        if isinstance(embeddings, bytes):
+            return np.frombuffer(embeddings, dtype=np.float32).reshape(-1, doc['dim'])
+        # Documents indexed before embeddings were stored as binary
+        return np.asarray(embeddings, dtype=np.float32)
+
+    @staticmethod
+    def _quantized_rows(doc: Dict[str, Any], rows: np.ndarray) -> np.ndarray:
+        """Stored int8 chunk embeddings, or the float32 rows quantized on load"""
+        embeddings_i8 = doc.get('embeddings_i8')
+        if embeddings_i8:
+            return np.frombuffer(embeddings_i8, dtype=np.int8).reshape(rows.shape)
+        return quantize(rows)
+
+    @staticmethod
+    def _binary_rows(doc: Dict[str, Any], rows: np.ndarray) -> np.ndarray:
+        """Stored packed sign bits of the chunk embeddings, or computed from the float32 rows"""
+        embeddings_bits = doc.get('embeddings_bits')
+        if embeddings_bits:
+            return np.frombuffer(embeddings_bits, dtype=np.uint8).reshape(len(rows), -1)
+        return binarize(rows)
+
     async def batch_index_documents(self, documents: List[Dict[str, Any]]) -> bool:
         """Batch index multiple documents"""
         try:
+            # Encode the chunks of every document in one call, then split them back per document
+            doc_chunks = [self._chunk_content(doc['content']) for doc in documents]
+            offsets = np.zeros(len(doc_chunks) + 1, dtype=np.intp)
+            np.cumsum([len(chunks) for chunks in doc_chunks], out=offsets[1:])
+            embeddings = await self.generate_embeddings([chunk for chunks in doc_chunks for chunk in chunks])
+
             indexed_docs = []
-            for doc in documents:
-                chunks = self._chunk_content(doc['content'])
-                chunk_embeddings = await self.generate_embeddings(chunks)
+            for i, (doc, chunks) in enumerate(zip(documents, doc_chunks)):
+                chunk_embeddings = embeddings[offsets[i]:offsets[i + 1]]
                 indexed_docs.append({
                     'document_id': doc['document_id'],
                     'chunks': chunks,
-                    'embeddings': chunk_embeddings.tolist(),
+                    'embeddings': Binary(chunk_embeddings.astype(np.float32, copy=False).tobytes()),
+                    'embeddings_i8': Binary(quantize(chunk_embeddings).tobytes()),
+                    'embeddings_bits': Binary(binarize(chunk_embeddings).tobytes()),
+                    'dim': chunk_embeddings.shape[-1],
                     'metadata': doc['metadata'],
                     'indexed_at': datetime.utcnow().isoformat(),
                     'chunk_count': len(chunks)
                 })
 
-            return await self.db_manager.batch_update_vectors(indexed_docs)
+            updated = await self.db_manager.batch_update_vectors(indexed_docs)
+            self._matrix_cache.clear()
+            return updated
         except Exception as e:
             logging.error(f"Error batch indexing documents: {str(e)}")
             raise
@@ -125,7 +311,9 @@ class VectorSearch:
     async def delete_document_vectors(self, doc_id: str) -> bool:
         """Delete document vectors from the index"""
         try:
-            return await self.db_manager.delete_document_vectors(doc_id)
+            updated = await self.db_manager.delete_document_vectors(doc_id)
+            self._matrix_cache.clear()
+            return updated
         except Exception as e:
             logging.error(f"Error deleting document vectors for {doc_id}: {str(e)}")
             raise
@@ -133,7 +321,7 @@ class VectorSearch:
     async def reindex_document(self, doc_id: str, content: str, metadata: Dict[str, Any]) -> bool:
         """Reindex document with new content"""
         try:
-            await self.delete_document_vectors(doc_id)
+            # index_document upserts over the old vectors, so the document never drops out of search
             return await self.index_document(doc_id, content, metadata)
         except Exception as e:
             logging.error(f"Error reindexing document {doc_id}: {str(e)}")
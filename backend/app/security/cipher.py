@@ -0,0 +1,46 @@
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from typing import Union
+import base64
+import os
+
+class DocumentCipher:
+    """AES-256-GCM encryption keyed from a Fernet key; Fernet tokens written before still decrypt"""
+    PREFIX = b'v1:'
+    TEXT_PREFIX = 'v1:'
+    NONCE_SIZE = 12
+
+    def __init__(self, fernet_key: Union[bytes, str], associated_data: bytes = b'doc'):
+        self.fernet = Fernet(fernet_key)
+        self.associated_data = associated_data
+        # Separate AES-GCM key derived from the Fernet key material
+        aes_key = HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=None,
+            info=b'knowledge-window aes-gcm'
+        ).derive(base64.urlsafe_b64decode(fernet_key))
+        self.aesgcm = AESGCM(aes_key)
+
+    def encrypt(self, data: bytes) -> bytes:
+        """Return PREFIX || nonce || ciphertext+tag"""
+        nonce = os.urandom(self.NONCE_SIZE)
+        return self.PREFIX + nonce + self.aesgcm.encrypt(nonce, data, self.associated_data)
+
+    def decrypt(self, token: bytes) -> bytes:
+        if not token.startswith(self.PREFIX):
+            return self.fernet.decrypt(token)
+        start = len(self.PREFIX)
+        nonce = token[start:start + self.NONCE_SIZE]
+        return self.aesgcm.decrypt(nonce, token[start + self.NONCE_SIZE:], self.associated_data)
+
+    def encrypt_text(self, data: bytes) -> str:
+        """Encrypt to a string token, for values stored in text fields"""
+        return self.TEXT_PREFIX + base64.urlsafe_b64encode(self.encrypt(data)[len(self.PREFIX):]).decode()
+
+    def decrypt_text(self, token: str) -> bytes:
+        if not token.startswith(self.TEXT_PREFIX):
+            return self.fernet.decrypt(token.encode())
+        return self.decrypt(self.PREFIX + base64.urlsafe_b64decode(token[len(self.TEXT_PREFIX):]))
@@ -1,5 +1,6 @@
 from cryptography.fernet import Fernet
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, BinaryIO, Tuple
+from collections import OrderedDict
 import os
 import json
 import hashlib
@@ -8,24 +9,41 @@ from fastapi import HTTPException, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import jwt
 from pathlib import Path
+from .cipher import DocumentCipher
 
-class DocumentSecurity:
-    def __init__(self):
+# Metadata fields encrypted together into '_sensitive'; earlier versions encrypted
+# the same fields one token each, which decrypt still reads when '_sensitive' is absent
+SENSITIVE_FIELDS = ['title', 'author', 'tags']
+
+# Key and cipher are loaded once per process; a DocumentSecurity is created per processor
+_shared_cipher: Optional[Tuple[bytes, DocumentCipher]] = None
+
+def _get_cipher() -> Tuple[bytes, DocumentCipher]:
+    global _shared_cipher
+    if _shared_cipher is None:
         # Generate or load encryption key
         key_path = Path("keys/document_key.key")
         key_path.parent.mkdir(exist_ok=True)
 
         if key_path.exists():
             with open(key_path, "rb") as key_file:
-                self.key = key_file.read()
+                key = key_file.read()
         else:
-            self.key = Fernet.generate_key()
+            key = Fernet.generate_key()
             with open(key_path, "wb") as key_file:
-                key_file.write(self.key)
+                key_file.write(key)
 
-        self.cipher_suite = Fernet(self.key)
+        _shared_cipher = (key, DocumentCipher(key))
+    return _shared_cipher
+
+class DocumentSecurity:
+    def __init__(self):
+        self.key, self.cipher_suite = _get_cipher()
         self.security = HTTPBearer()
         self.SECRET_KEY = os.getenv("JWT_SECRET_KEY", self._generate_secret_key())
+        # Verified payloads by raw token, so repeat requests skip the signature check
+        self._token_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._token_cache_size = 10_000
 
     def _generate_secret_key(self) -> str:
         """Generate a secure secret key if none exists"""
@@ -37,15 +55,13 @@ class DocumentSecurity:
             # Encrypt content
             encrypted_content = self.cipher_suite.encrypt(content)
 
-            # Encrypt sensitive metadata
-            sensitive_fields = ['title', 'author', 'tags']
-            encrypted_metadata = metadata.copy()
-
-            for field in sensitive_fields:
-                if field in metadata:
-                    encrypted_metadata[field] = self.cipher_suite.encrypt(
-                        metadata[field].encode()
-                    ).decode()
+            # Encrypt sensitive metadata as one blob instead of one token per field
+            encrypted_metadata = {k: v for k, v in metadata.items() if k not in SENSITIVE_FIELDS}
+            sensitive = {field: metadata[field] for field in SENSITIVE_FIELDS if field in metadata}
+            # Always written, so decrypt can tell this format from per-field tokens
+            encrypted_metadata['_sensitive'] = self.cipher_suite.encrypt_text(
+                json.dumps(sensitive).encode()
+            )
 
             return {
                 'content': encrypted_content,
@@ -65,14 +81,17 @@ class DocumentSecurity:
             decrypted_content = self.cipher_suite.decrypt(encrypted_data['content'])
 
             # Decrypt sensitive metadata
-            sensitive_fields = ['title', 'author', 'tags']
             decrypted_metadata = encrypted_data['metadata'].copy()
-
-            for field in sensitive_fields:
-                if field in encrypted_data['metadata']:
-                    decrypted_metadata[field] = self.cipher_suite.decrypt(
-                        encrypted_data['metadata'][field].encode()
-                    ).decode()
+            sensitive = decrypted_metadata.pop('_sensitive', None)
+            if sensitive is not None:
+                decrypted_metadata.update(json.loads(self.cipher_suite.decrypt_text(sensitive)))
+            else:
+                # Documents encrypted with one token per field
+                for field in SENSITIVE_FIELDS:
+                    if field in decrypted_metadata:
+                        decrypted_metadata[field] = self.cipher_suite.decrypt_text(
+                            decrypted_metadata[field]
+                        ).decode()
 
             return {
                 'content': decrypted_content,
@@ -96,23 +115,34 @@ class DocumentSecurity:
 
     def verify_token(self, credentials: HTTPAuthorizationCredentials = Security(HTTPBearer())) -> Dict[str, Any]:
         """Verify JWT token and return payload"""
-        try:
-            payload = jwt.decode(
-                credentials.credentials,
-                self.SECRET_KEY,
-                algorithms=['HS256']
-            )
-            if payload['exp'] < datetime.utcnow().timestamp():
+        token = credentials.credentials
+        payload = self._token_cache.get(token)
+        if payload is None:
+            try:
+                payload = jwt.decode(
+                    token,
+                    self.SECRET_KEY,
+                    algorithms=['HS256']
+                )
+            except jwt.JWTError:
                 raise HTTPException(
                     status_code=401,
-                    detail='Token has expired'
+                    detail='Invalid authentication token'
                 )
-            return payload
-        except jwt.JWTError:
+            self._token_cache[token] = payload
+            if len(self._token_cache) > self._token_cache_size:
+                self._token_cache.popitem(last=False)
+        else:
+            self._token_cache.move_to_end(token)
+
+        # Cached payloads are re-checked for expiry on every use
+        if payload['exp'] < datetime.utcnow().timestamp():
+            self._token_cache.pop(token, None)
             raise HTTPException(
                 status_code=401,
-                detail='Invalid authentication token'
+                detail='Token has expired'
             )
+        return payload
 
     def check_permission(self, token_data: Dict[str, Any], required_permission: str) -> bool:
         """Check if user has required permission"""
@@ -127,14 +157,24 @@ class DocumentSecurity:
         """Create SHA-256 hash of file content for integrity verification"""
         return hashlib.sha256(content).hexdigest()
 
+    def hash_stream(self, file: BinaryIO, chunk_size: int = 1 << 20) -> str:
+        """SHA-256 of a binary file object, read in chunks instead of loaded whole"""
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+        return digest.hexdigest()
+
     def verify_file_integrity(self, content: bytes, stored_hash: str) -> bool:
         """Verify file integrity using stored hash"""
         return self.hash_file(content) == stored_hash
 
     def generate_document_id(self, content: bytes, metadata: Dict[str, Any]) -> str:
         """Generate unique document ID based on content and metadata"""
-        unique_string = f"{content}{json.dumps(metadata, sort_keys=True)}{datetime.utcnow().isoformat()}"
-        return hashlib.sha256(unique_string.encode()).hexdigest()
+        # Hash the raw bytes directly rather than formatting them into one large string
+        digest = hashlib.sha256(content)
+        digest.update(json.dumps(metadata, sort_keys=True, separators=(',', ':')).encode())
+        digest.update(datetime.utcnow().isoformat().encode())
+        return digest.hexdigest()
 
     async def secure_document(self, content: bytes, metadata: Dict[str, Any]) -> Dict[str, Any]:
         """Complete document security process"""
@@ -3,16 +3,29 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import jwt
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
+from collections import OrderedDict, defaultdict, deque
+import asyncio
 import hashlib
+import time
 from cryptography.fernet import Fernet
+from .cipher import DocumentCipher
 import os
 import json
 
+# HTML-escapes markup characters in a single pass
+_XSS_TABLE = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&#x27;'
+})
+
 class SecurityMiddleware:
     def __init__(self):
         # Generate or load encryption key
         self.encryption_key = os.getenv('ENCRYPTION_KEY', Fernet.generate_key())
-        self.fernet = Fernet(self.encryption_key)
+        self.cipher = DocumentCipher(self.encryption_key)
 
         # JWT settings
         self.jwt_secret = os.getenv('JWT_SECRET', 'your-secret-key')
@@ -22,20 +35,37 @@ class SecurityMiddleware:
         # Security bearer token
         self.security = HTTPBearer()
 
+        # Verified payloads by raw token, so repeat requests skip the signature check
+        self._token_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._token_cache_size = 10_000
+
         # Rate limiting settings
         self.rate_limit_window = 60  # seconds
         self.max_requests = 100
-        self.request_history: Dict[str, list] = {}
+        # Monotonic request times per IP, at most max_requests each
+        self.request_history: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.max_requests))
+        self._prune_task: Optional[asyncio.Task] = None
 
     async def verify_token(self, credentials: HTTPAuthorizationCredentials = Security(HTTPBearer())) -> Dict[str, Any]:
         """Verify JWT token and return payload"""
-        try:
-            payload = jwt.decode(credentials.credentials, self.jwt_secret, algorithms=[self.jwt_algorithm])
-            if payload.get('exp') < datetime.utcnow().timestamp():
-                raise HTTPException(status_code=401, detail="Token has expired")
-            return payload
-        except jwt.JWTError:
-            raise HTTPException(status_code=401, detail="Invalid token")
+        token = credentials.credentials
+        payload = self._token_cache.get(token)
+        if payload is None:
+            try:
+                payload = jwt.decode(token, self.jwt_secret, algorithms=[self.jwt_algorithm])
+            except jwt.JWTError:
+                raise HTTPException(status_code=401, detail="Invalid token")
+            self._token_cache[token] = payload
+            if len(self._token_cache) > self._token_cache_size:
+                self._token_cache.popitem(last=False)
+        else:
+            self._token_cache.move_to_end(token)
+
+        # Cached payloads are re-checked for expiry on every use
+        if payload.get('exp') < datetime.utcnow().timestamp():
+            self._token_cache.pop(token, None)
+            raise HTTPException(status_code=401, detail="Token has expired")
+        return payload
 
     def create_token(self, data: Dict[str, Any]) -> str:
         """Create JWT token with payload"""
@@ -49,12 +79,12 @@ class SecurityMiddleware:
     def encrypt_data(self, data: Any) -> bytes:
         """Encrypt sensitive data"""
         json_data = json.dumps(data)
-        return self.fernet.encrypt(json_data.encode())
+        return self.cipher.encrypt(json_data.encode())
 
     def decrypt_data(self, encrypted_data: bytes) -> Any:
         """Decrypt sensitive data"""
         try:
-            decrypted_data = self.fernet.decrypt(encrypted_data)
+            decrypted_data = self.cipher.decrypt(encrypted_data)
             return json.loads(decrypted_data.decode())
         except Exception:
             raise HTTPException(status_code=400, detail="Failed to decrypt data")
@@ -65,30 +95,35 @@ class SecurityMiddleware:
 
     async def rate_limit(self, request: Request) -> None:
         """Implement rate limiting"""
-        client_ip = request.client.host
-        current_time = datetime.utcnow().timestamp()
-
-        # Clean old requests
-        if client_ip in self.request_history:
-            self.request_history[client_ip] = [
-                timestamp for timestamp in self.request_history[client_ip]
-                if current_time - timestamp < self.rate_limit_window
-            ]
-        else:
-            self.request_history[client_ip] = []
+        if self._prune_task is None or self._prune_task.done():
+            self._prune_task = asyncio.create_task(self._prune_request_history())
+
+        history = self.request_history[request.client.host]
+        current_time = time.monotonic()
+
+        # Clean old requests; timestamps are in arrival order
+        while history and current_time - history[0] >= self.rate_limit_window:
+            history.popleft()
 
         # Check rate limit
-        if len(self.request_history[client_ip]) >= self.max_requests:
+        if len(history) >= self.max_requests:
             raise HTTPException(status_code=429, detail="Too many requests")
 
         # Add current request
-        self.request_history[client_ip].append(current_time)
+        history.append(current_time)
+
+    async def _prune_request_history(self) -> None:
+        """Drop IPs with no requests inside the window, once a minute"""
+        while True:
+            await asyncio.sleep(60)
+            cutoff = time.monotonic() - self.rate_limit_window
+            for client_ip in [ip for ip, history in self.request_history.items() if not history or history[-1] <= cutoff]:
+                del self.request_history[client_ip]
 
     def sanitize_input(self, data: str) -> str:
         """Sanitize user input to prevent XSS and injection attacks"""
-        # Remove potentially dangerous characters and HTML tags
-        sanitized = data.replace("<", "&lt;").replace(">", "&gt;")
-        return sanitized
+        # Escape HTML markup and quote characters
+        return data.translate(_XSS_TABLE)
 
     async def process_request(self, request: Request) -> None:
         """Process incoming request with security checks"""
@@ -0,0 +1,14 @@
+"""Build the optional Cython extensions in place: python setup.py build_ext --inplace"""
+from setuptools import setup, Extension
+
+try:
+    from Cython.Build import cythonize
+    ext_modules = cythonize(
+        [Extension('processors.url_render', ['processors/url_render.pyx'])],
+        language_level=3
+    )
+except ImportError:
+    # Without Cython the pure-Python fallback in processors/html_utils.py is used
+    ext_modules = []
+
+setup(name='knowledge-window-backend-ext', ext_modules=ext_modules)
@@ -1,53 +1,169 @@
 from sentence_transformers import SentenceTransformer
+import asyncio
+import heapq
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from motor.motor_asyncio import AsyncIOMotorClient
+from .embedding_models import get_model
+from .vector_store import unpack_embedding
+
+try:
+    # SIMD cosine kernels (AVX2/AVX-512/NEON); numpy is used when unavailable
+    import simsimd
+except ImportError:
+    simsimd = None
+
+# Using a lightweight multilingual model suitable for commercial use
+MODEL_NAME = 'paraphrase-multilingual-MiniLM-L12-v2'
+
+class EmbeddingCoalescer:
+    """Collects concurrent embedding requests and encodes them as one model batch"""
+    MAX_BATCH = 64
+    MAX_WAIT = 0.005  # seconds to wait for more requests after the first one
+
+    def __init__(self, model: SentenceTransformer):
+        self.model = model
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+
+    async def encode(self, text: str) -> List[float]:
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def encode_many(self, texts: List[str]) -> List[List[float]]:
+        return list(await asyncio.gather(*(self.encode(text) for text in texts)))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.MAX_WAIT
+            while len(batch) < self.MAX_BATCH:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                embeddings = await asyncio.to_thread(
+                    self.model.encode, [text for text, _ in batch], normalize_embeddings=True
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding.tolist())
+
+# Model and coalescer are shared by all VectorSearch instances (one is created per request)
+_coalescer: Optional[EmbeddingCoalescer] = None
+
+def get_embedding_coalescer() -> EmbeddingCoalescer:
+    global _coalescer
+    if _coalescer is None:
+        _coalescer = EmbeddingCoalescer(get_model(MODEL_NAME))
+    return _coalescer
 
 class VectorSearch:
+    # Documents scored per similarity batch while streaming the collection
+    SCAN_BATCH = 256
+
     def __init__(self, mongodb_client: AsyncIOMotorClient):
-        # Using a lightweight multilingual model suitable for commercial use
-        self.model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
+        self.coalescer = get_embedding_coalescer()
+        self.model = self.coalescer.model
         self.mongodb_client = mongodb_client
         self.collection = self.mongodb_client.knowledge_window.documents
 
     async def search_cross_collection(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         # Generate embedding for the search query
-        query_embedding = self.generate_embedding(query)
-
-        # Search in MongoDB using vector similarity
-        cursor = self.collection.find({})
-        documents = await cursor.to_list(length=100)  # Fetch initial batch
-
-        # Calculate similarities and sort documents
-        results = []
-        for doc in documents:
-            if 'vector_embedding' in doc:
-                similarity = self.calculate_similarity(
-                    query_embedding,
-                    doc['vector_embedding']
-                )
-                results.append({
-                    'id': str(doc.get('_id')),
-                    'title': doc.get('title', ''),
-                    'text': doc.get('text', ''),
-                    'source_type': doc.get('source_type', ''),
-                    'similarity': float(similarity)
-                })
-
-        # Sort by similarity and return top_k results
-        results.sort(key=lambda x: x['similarity'], reverse=True)
-        return results[:limit]
+        query_embedding = await self.coalescer.encode(query)
+
+        # Stream only the fields needed for scoring; text is fetched for the winners afterwards
+        cursor = self.collection.find(
+            {'vector_embedding': {'$exists': True}},
+            {'_id': 1, 'vector_embedding': 1, 'title': 1, 'source_type': 1}
+        ).batch_size(self.SCAN_BATCH)
+
+        # Min-heap of the best `limit` (similarity, seq, doc) seen so far
+        top: List[tuple] = []
+        seq = 0
+
+        def score(batch: List[Dict[str, Any]]):
+            nonlocal seq
+            similarities = self.calculate_similarities(
+                query_embedding,
+                np.stack([unpack_embedding(doc.pop('vector_embedding')) for doc in batch])
+            )
+            for doc, similarity in zip(batch, similarities):
+                item = (float(similarity), seq, doc)
+                seq += 1
+                if len(top) < limit:
+                    heapq.heappush(top, item)
+                elif item[0] > top[0][0]:
+                    heapq.heapreplace(top, item)
+
+        batch: List[Dict[str, Any]] = []
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) == self.SCAN_BATCH:
+                score(batch)
+                batch = []
+        if batch:
+            score(batch)
+        if not top:
+            return []
+
+        top.sort(key=lambda item: item[0], reverse=True)
+        texts = {
+            doc['_id']: doc.get('text', '')
+            async for doc in self.collection.find(
+                {'_id': {'$in': [doc['_id'] for _, _, doc in top]}},
+                {'text': 1}
+            )
+        }
+
+        return [{
+            'id': str(doc.get('_id')),
+            'title': doc.get('title', ''),
+            'text': texts.get(doc['_id'], ''),
+            'source_type': doc.get('source_type', ''),
+            'similarity': similarity
+        } for similarity, _, doc in top]
+
+    async def batch_generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        # Coalesced with any concurrent queries into shared model batches
+        return await self.coalescer.encode_many(texts)
 
     def generate_embedding(self, text: str) -> List[float]:
-        # Generate embeddings for the document text
-        embedding = self.model.encode(text)
+        # Generate unit-length embeddings for the document text
+        embedding = self.model.encode(text, normalize_embeddings=True)
         return embedding.tolist()
 
     def calculate_similarity(self, query_embedding: List[float], document_embedding: List[float]) -> float:
-        # Calculate cosine similarity between query and document
-        query_array = np.array(query_embedding)
-        doc_array = np.array(document_embedding)
+        # Calculate cosine similarity between query and document; either may be un-normalized
+        query_array = np.asarray(query_embedding, dtype=np.float32)
+        doc_array = np.asarray(document_embedding, dtype=np.float32)
+        if simsimd is not None:
+            # simsimd returns the cosine distance
+            return 1.0 - float(simsimd.cosine(query_array, doc_array))
         similarity = np.dot(query_array, doc_array) / (
             np.linalg.norm(query_array) * np.linalg.norm(doc_array)
         )
         return float(similarity)
+
+    def calculate_similarities(self, query_embedding: List[float], document_embeddings: np.ndarray) -> np.ndarray:
+        # Cosine similarity (dot product of unit vectors) against every row of a (N, D) float32 matrix;
+        # rows come from unpack_embedding, which normalizes legacy arrays
+        query_array = np.asarray(query_embedding, dtype=np.float32)
+        if simsimd is not None:
+            return np.asarray(simsimd.cdist(query_array[None, :], document_embeddings, metric='dot'))[0]
+        return document_embeddings @ query_array
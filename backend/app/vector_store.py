@@ -1,19 +1,126 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from pymongo.errors import OperationFailure
+from pymongo.operations import SearchIndexModel
+from bson import Binary
 import numpy as np
-from sentence_transformers import SentenceTransformer
+import logging
+import os
+from .embedding_models import get_model
+
+try:
+    # SIMD dot-product kernels; numpy is used when unavailable
+    import simsimd
+except ImportError:
+    simsimd = None
+
+# Atlas vector index on vector_embedding (numDimensions=384, similarity='cosine')
+VECTOR_INDEX = os.getenv("MONGODB_VECTOR_INDEX", "vec")
+
+# BSON vector (binary subtype 9) header for packed little-endian float32
+_FLOAT32_VECTOR_HEADER = b'\x27\x00'
+
+def pack_embedding(embedding: np.ndarray) -> Binary:
+    """Encode an embedding as a BSON float32 vector, which Atlas vector indexes accept"""
+    return Binary(_FLOAT32_VECTOR_HEADER + np.asarray(embedding, dtype='<f4').tobytes(), 9)
+
+def unpack_embedding(value: Any) -> np.ndarray:
+    """Decode a stored embedding, either a BSON float32 vector or a legacy array of doubles"""
+    if isinstance(value, bytes):
+        return np.frombuffer(value, dtype='<f4', offset=len(_FLOAT32_VECTOR_HEADER))
+    # Legacy arrays were stored without normalization; scale them to unit length so
+    # dot-product scores stay cosine similarities
+    vector = np.asarray(value, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+async def score_vectors(
+    collection: AsyncIOMotorCollection,
+    query_embedding: Any,
+    limit: int,
+    query_filter: Optional[Dict[str, Any]] = None
+) -> List[Tuple[Any, float]]:
+    """Exact dot-product search over vector_embedding, in either storage format; returns (_id, similarity) best first"""
+    query_array = np.asarray(query_embedding, dtype=np.float32)
+    ids = []
+    vectors = []
+    # Only _id and the vector are read; display fields are fetched for the winners
+    async for doc in collection.find(
+        {**(query_filter or {}), "vector_embedding": {"$exists": True}},
+        {"_id": 1, "vector_embedding": 1}
+    ):
+        vector = unpack_embedding(doc['vector_embedding'])
+        if vector.shape == query_array.shape:
+            ids.append(doc['_id'])
+            vectors.append(vector)
+    if not ids:
+        return []
+
+    matrix = np.stack(vectors)
+    if simsimd is not None:
+        similarities = np.asarray(simsimd.cdist(query_array[None, :], matrix, metric='dot'))[0]
+    else:
+        similarities = matrix @ query_array
+
+    top = np.argsort(-similarities)[:limit]
+    return [(ids[i], float(similarities[i])) for i in top]
+
+async def fetch_scored(
+    collection: AsyncIOMotorCollection,
+    scored: List[Tuple[Any, float]],
+    projection: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """Load the given fields for score_vectors results, keeping their order and adding 'similarity'"""
+    if not scored:
+        return []
+    documents = {
+        doc['_id']: doc
+        async for doc in collection.find({"_id": {"$in": [_id for _id, _ in scored]}}, projection)
+    }
+
+    results = []
+    for _id, similarity in scored:
+        doc = documents.get(_id)
+        if doc is not None:
+            doc['_id'] = str(doc['_id'])
+            doc['similarity'] = similarity
+            results.append(doc)
+    return results
+
+async def create_vector_index(mongodb_client: AsyncIOMotorClient) -> None:
+    """Create the Atlas vector index used by VectorStore.search_similar, if the deployment supports it"""
+    collection = mongodb_client.knowledge_window.documents
+    try:
+        existing = await collection.list_search_indexes(VECTOR_INDEX).to_list(length=1)
+        if existing:
+            return
+        await collection.create_search_index(SearchIndexModel(
+            name=VECTOR_INDEX,
+            type="vectorSearch",
+            definition={
+                "fields": [
+                    {"type": "vector", "path": "vector_embedding", "numDimensions": 384, "similarity": "cosine"},
+                    {"type": "filter", "path": "metadata.content_type"}
+                ]
+            }
+        ))
+    except Exception as e:
+        logging.error(f"Vector index not created: {str(e)}")
 
 class VectorStore:
+    # Cleared on the first OperationFailure from $vectorSearch (non-Atlas deployments)
+    _atlas_available = True
+
     def __init__(self, mongodb_client: AsyncIOMotorClient):
         self.client = mongodb_client
         self.collection: AsyncIOMotorCollection = self.client.knowledge_window.documents
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.model = get_model('all-MiniLM-L6-v2')
 
     async def store_document(self, content: str, metadata: Dict[str, Any]) -> str:
         """Store document with vector embedding"""
         try:
             # Generate vector embedding
-            embedding = self.model.encode(content).tolist()
+            embedding = pack_embedding(self.model.encode(content, normalize_embeddings=True))
 
             # Prepare document
             document = {
@@ -39,63 +146,74 @@ class VectorStore:
         """Search for similar documents using cosine similarity"""
         try:
             # Generate query embedding
-            query_embedding = self.model.encode(query).tolist()
-
-            # Build aggregation pipeline
-            pipeline = [
-                {
-                    "$addFields": {
-                        "similarity": {
-                            "$reduce": {
-                                "input": {"$range": [0, {"$size": "$vector_embedding"}]},
-                                "initialValue": 0,
-                                "in": {
-                                    "$add": [
-                                        "$$value",
-                                        {"$multiply": [
-                                            {"$arrayElemAt": ["$vector_embedding", "$$this"]},
-                                            {"$arrayElemAt": [query_embedding, "$$this"]}
-                                        ]}
-                                    ]
-                                }
-                            }
-                        }
-                    }
-                }
-            ]
-
-            # Add content type filter if specified
-            if content_type:
-                pipeline.append({
-                    "$match": {
-                        "metadata.content_type": content_type
-                    }
-                })
+            query_embedding = self.model.encode(query, normalize_embeddings=True).tolist()
 
-            # Add similarity threshold and sort
-            pipeline.extend([
-                {"$match": {"similarity": {"$gt": threshold}}},
-                {"$sort": {"similarity": -1}},
-                {"$limit": limit},
-                {
-                    "$project": {
-                        "_id": 1,
-                        "content": 1,
-                        "metadata": 1,
-                        "similarity": 1
-                    }
+            if VectorStore._atlas_available:
+                try:
+                    return await self._atlas_search(query_embedding, limit, content_type, threshold)
+                except OperationFailure as e:
+                    # Self-hosted MongoDB has no $vectorSearch stage; stop trying for this process
+                    logging.error(f"$vectorSearch unavailable, scoring on the client: {str(e)}")
+                    VectorStore._atlas_available = False
+
+            return await self._client_search(query_embedding, limit, content_type, threshold)
+
+        except Exception as e:
+            raise Exception(f"Search failed: {str(e)}")
+
+    async def _atlas_search(
+        self,
+        query_embedding: List[float],
+        limit: int,
+        content_type: Optional[str],
+        threshold: float
+    ) -> List[Dict[str, Any]]:
+        """Approximate nearest neighbour search through the Atlas vector index"""
+        vector_search = {
+            "index": VECTOR_INDEX,
+            "path": "vector_embedding",
+            "queryVector": query_embedding,
+            "numCandidates": 10 * limit,
+            "limit": limit
+        }
+        if content_type:
+            vector_search["filter"] = {"metadata.content_type": content_type}
+
+        pipeline = [
+            {"$vectorSearch": vector_search},
+            {
+                "$project": {
+                    "_id": 1,
+                    "content": 1,
+                    "metadata": 1,
+                    "score": {"$meta": "vectorSearchScore"}
                 }
-            ])
+            }
+        ]
 
-            results = []
-            async for doc in self.collection.aggregate(pipeline):
+        results = []
+        async for doc in self.collection.aggregate(pipeline):
+            # Atlas reports cosine scores as (1 + cos) / 2
+            similarity = 2 * doc.pop('score') - 1
+            if similarity > threshold:
                 doc['_id'] = str(doc['_id'])
+                doc['similarity'] = similarity
                 results.append(doc)
+        return results
 
-            return results
-
-        except Exception as e:
-            raise Exception(f"Search failed: {str(e)}")
+    async def _client_search(
+        self,
+        query_embedding: List[float],
+        limit: int,
+        content_type: Optional[str],
+        threshold: float
+    ) -> List[Dict[str, Any]]:
+        """Exact search: filter on metadata in MongoDB, score the candidates locally"""
+        query_filter = {"metadata.content_type": content_type} if content_type else {}
+        scored = await score_vectors(self.collection, query_embedding, limit, query_filter)
+        # content is loaded only for hits above the threshold
+        scored = [(_id, similarity) for _id, similarity in scored if similarity > threshold]
+        return await fetch_scored(self.collection, scored, {"content": 1, "metadata": 1})
 
     async def delete_document(self, document_id: str) -> bool:
         """Delete a document by ID"""
@@ -117,7 +235,7 @@ class VectorStore:
 
             if content:
                 # Generate new embedding for updated content
-                embedding = self.model.encode(content).tolist()
+                embedding = pack_embedding(self.model.encode(content, normalize_embeddings=True))
                 update_data.update({
                     'content': content,
                     'vector_embedding': embedding
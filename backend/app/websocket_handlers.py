@@ -1,25 +1,70 @@
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, Callable, Awaitable, Union
 import asyncio
+import logging
+from functools import partial, lru_cache
 from motor.motor_asyncio import AsyncIOMotorClient
 from fastapi import WebSocket
 from .processors.document_processors import get_processor_for_content_type
 from .processors.url_processor import URLProcessor
 from .processors.notion_processor import NotionProcessor
 from .processors.confluence_processor import ConfluenceProcessor
-import json
+import orjson
+
+logger = logging.getLogger(__name__)
+
+_ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+
+# Broadcast fan-out limits
+MAX_CONCURRENT_SENDS = 256
+SEND_TIMEOUT = 5.0  # seconds
+
+# Largest document accepted as binary preview frames
+MAX_PREVIEW_CONTENT = 50 * 1024 * 1024  # bytes
+
+# Preview node types
+_URL_LIKE = frozenset({'notion', 'confluence', 'url'})
+_DOC_LIKE = frozenset({'pdf', 'docx', 'txt'})
+_CONTENT_TYPE = {
+    'pdf': 'application/pdf',
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'txt': 'text/plain'
+}
+
+def _dumps(message: Dict[str, Any]) -> str:
+    # orjson output is decoded because clients JSON.parse text frames
+    return orjson.dumps(message, option=_ORJSON_OPTIONS).decode()
+
+async def _send(websocket: WebSocket, message: Dict[str, Any]):
+    await websocket.send_text(_dumps(message))
 
 class WebSocketHandler:
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
+        # send_text bound at connect, so broadcasts skip the per-client attribute lookup
+        self._send_text: Dict[str, Callable[[str], Awaitable[None]]] = {}
+        # client_id -> in-progress binary preview upload
+        self._pending_uploads: Dict[str, Dict[str, Any]] = {}
         self.processors: Dict[str, Any] = {}
         self.mongodb_client: Optional[AsyncIOMotorClient] = None
+        self._send_semaphore = asyncio.Semaphore(MAX_CONCURRENT_SENDS)
+        # message type -> handler(client_id, payload)
+        self._dispatch = {'preview_requested': self._handle_preview_request}
+        for update_type in ('node_added', 'node_moved', 'node_deleted'):
+            self._dispatch[update_type] = partial(self._handle_node_update, update_type)
+        for update_type in ('connection_added', 'connection_deleted'):
+            self._dispatch[update_type] = partial(self._handle_connection_update, update_type)
 
     async def initialize(self, mongodb_client: AsyncIOMotorClient):
         """Initialize processors with MongoDB client"""
         self.mongodb_client = mongodb_client
+        url_processor = URLProcessor()
+        url_processor._mongodb = mongodb_client
         self.processors = {
-            'url': URLProcessor(mongodb_client),
-            'document': lambda content_type: get_processor_for_content_type(content_type, mongodb_client),
+            'url': url_processor,
+            # One processor per content type, reused across preview requests
+            'document': lru_cache(maxsize=16)(
+                lambda content_type: get_processor_for_content_type(content_type, mongodb_client)
+            ),
             'notion': NotionProcessor(),
             'confluence': ConfluenceProcessor()
         }
@@ -27,32 +72,43 @@ class WebSocketHandler:
     async def connect(self, websocket: WebSocket, client_id: str):
         await websocket.accept()
         self.active_connections[client_id] = websocket
+        self._send_text[client_id] = websocket.send_text
 
     def disconnect(self, client_id: str):
         if client_id in self.active_connections:
             del self.active_connections[client_id]
+        self._send_text.pop(client_id, None)
+        self._pending_uploads.pop(client_id, None)
 
     async def broadcast(self, message: Dict[str, Any]):
-        """Broadcast message to all connected clients"""
-        for connection in self.active_connections.values():
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                print(f"Error broadcasting message: {e}")
-
-    async def handle_message(self, client_id: str, message_raw: str):
+        """Broadcast message to all connected clients concurrently"""
+        # Serialized once; every client gets the same frame
+        frame = _dumps(message)
+
+        async def safe_send(send_text: Callable[[str], Awaitable[None]]):
+            async with self._send_semaphore:
+                try:
+                    await asyncio.wait_for(send_text(frame), SEND_TIMEOUT)
+                except Exception as e:
+                    logger.error("Error broadcasting message: %s", e)
+
+        await asyncio.gather(*(safe_send(send_text) for send_text in tuple(self._send_text.values())))
+
+    async def handle_message(self, client_id: str, message_raw: Union[str, bytes]):
         """Handle incoming WebSocket messages"""
         try:
-            message = json.loads(message_raw)
-            message_type = message.get('type')
-            payload = message.get('payload', {})
+            if isinstance(message_raw, (bytes, bytearray, memoryview)) and client_id in self._pending_uploads:
+                await self._handle_upload_chunk(client_id, message_raw)
+                return
 
-            if message_type == 'preview_requested':
-                await self._handle_preview_request(client_id, payload)
-            elif message_type in ['node_added', 'node_moved', 'node_deleted']:
-                await self._handle_node_update(message_type, payload)
-            elif message_type in ['connection_added', 'connection_deleted']:
-                await self._handle_connection_update(message_type, payload)
+            message = orjson.loads(message_raw)
+            if message.get('type') == 'preview_requested' and 'contentLen' in message:
+                await self._start_upload(client_id, message)
+                return
+
+            handler = self._dispatch.get(message.get('type'))
+            if handler is not None:
+                await handler(client_id, message.get('payload') or {})
 
         except Exception as e:
             error_message = {
@@ -62,7 +118,7 @@ class WebSocketHandler:
                     'client_id': client_id
                 }
             }
-            await self.active_connections[client_id].send_json(error_message)
+            await _send(self.active_connections[client_id], error_message)
 
     async def _handle_preview_request(self, client_id: str, payload: Dict[str, Any]):
         """Process preview requests for different node types"""
@@ -79,7 +135,7 @@ class WebSocketHandler:
                     'preview': preview_data
                 }
             }
-            await self.active_connections[client_id].send_json(response)
+            await _send(self.active_connections[client_id], response)
         except Exception as e:
             error_response = {
                 'type': 'preview_error',
@@ -88,19 +144,54 @@ class WebSocketHandler:
                     'error': str(e)
                 }
             }
-            await self.active_connections[client_id].send_json(error_response)
+            await _send(self.active_connections[client_id], error_response)
+
+    async def _start_upload(self, client_id: str, message: Dict[str, Any]):
+        """Preview request whose document content follows as binary frames of contentLen bytes in total"""
+        content_len = int(message['contentLen'])
+        if not 0 <= content_len <= MAX_PREVIEW_CONTENT:
+            raise ValueError(f"Invalid preview content length: {content_len}")
+
+        # Frames are written straight into one preallocated buffer; no base64 or join copies
+        buffer = bytearray(content_len)
+        self._pending_uploads[client_id] = {
+            'payload': message.get('payload') or {},
+            'buffer': buffer,
+            'view': memoryview(buffer),
+            'received': 0
+        }
+        if content_len == 0:
+            await self._finish_upload(client_id)
+
+    async def _handle_upload_chunk(self, client_id: str, chunk: Union[bytes, bytearray, memoryview]):
+        upload = self._pending_uploads[client_id]
+        start = upload['received']
+        end = start + len(chunk)
+        if end > len(upload['buffer']):
+            del self._pending_uploads[client_id]
+            raise ValueError("Preview content exceeds the announced contentLen")
+
+        upload['view'][start:end] = chunk
+        upload['received'] = end
+        if end == len(upload['buffer']):
+            await self._finish_upload(client_id)
+
+    async def _finish_upload(self, client_id: str):
+        upload = self._pending_uploads.pop(client_id)
+        upload['view'].release()
+        payload = upload['payload']
+        # bytearray rather than a memoryview: the text processor needs decode() and count()
+        payload['data'] = {**(payload.get('data') or {}), 'content': upload['buffer']}
+        await self._handle_preview_request(client_id, payload)
 
     async def _process_node(self, node_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Process different node types and return preview data"""
         try:
-            if node_type in ['notion', 'confluence']:
+            if node_type in _URL_LIKE:
                 processor = self.processors[node_type]
                 preview_data = await processor.get_preview(data.get('url', ''))
-            elif node_type == 'url':
-                processor = self.processors['url']
-                preview_data = await processor.get_preview(data.get('url', ''))
-            elif node_type in ['pdf', 'docx', 'txt']:
-                processor = self.processors['document'](f'application/{node_type}')
+            elif node_type in _DOC_LIKE:
+                processor = self.processors['document'](_CONTENT_TYPE[node_type])
                 preview_data = await processor.get_preview(
                     content=data.get('content', b''),
                     metadata=data.get('metadata', {})
@@ -115,14 +206,14 @@ class WebSocketHandler:
         except Exception as e:
             raise ValueError(f"Error processing {node_type} node: {str(e)}")
 
-    async def _handle_node_update(self, update_type: str, payload: Dict[str, Any]):
+    async def _handle_node_update(self, update_type: str, client_id: str, payload: Dict[str, Any]):
         """Handle node updates and broadcast to all clients"""
         await self.broadcast({
             'type': update_type,
             'payload': payload
         })
 
-    async def _handle_connection_update(self, update_type: str, payload: Dict[str, Any]):
+    async def _handle_connection_update(self, update_type: str, client_id: str, payload: Dict[str, Any]):
         """Handle connection updates and broadcast to all clients"""
         await self.broadcast({
             'type': update_type,
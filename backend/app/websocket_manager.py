@@ -1,50 +1,226 @@
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Set, Union
 import json
+import logging
+import os
+import orjson
 import asyncio
-from datetime import datetime
+import heapq
+import time
+import zlib
+from collections import defaultdict
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+_ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+
+# Per-client outbound buffering
+OUTBOUND_QUEUE_SIZE = 1024  # frames; a client this far behind is disconnected
+SEND_TIMEOUT = 5.0  # seconds before a slow client counts as failed
+
+# Opt-in compressed broadcasts (WS_DEFLATE=1). When enabled, a client that connects with
+# metadata {'accepts_deflate': True} receives broadcast frames above DEFLATE_MIN_SIZE as
+# binary zlib streams (inflate, then JSON.parse); every other frame stays JSON text.
+# The bundled frontend does not send accepts_deflate, so it is only for custom clients.
+DEFLATE_ENABLED = os.getenv("WS_DEFLATE", "0") == "1"
+DEFLATE_MIN_SIZE = 1024
+DEFLATE_LEVEL = 1
+
+def _dumps(message: Dict[str, Any]) -> str:
+    # orjson output is decoded because clients JSON.parse text frames
+    return orjson.dumps(message, option=_ORJSON_OPTIONS).decode()
+
+def _coalesce(frames: List[Union[str, bytes]]) -> List[Union[str, bytes]]:
+    """Merge runs of text frames into batch frames; compressed frames are sent on their own"""
+    out = []
+    run = []
+    for frame in frames + [None]:
+        if isinstance(frame, str):
+            run.append(frame)
+            continue
+        if len(run) == 1:
+            out.append(run[0])
+        elif run:
+            out.append('{"type":"batch","items":[' + ','.join(run) + ']}')
+        run = []
+        if frame is not None:
+            out.append(frame)
+    return out
+
+def _utc_iso(ts: float) -> str:
+    """Naive UTC ISO string for a Unix timestamp, the format datetime.utcnow().isoformat() gives"""
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None).isoformat()
+
+# Last formatted timestamp, reused by everything stamped within the same millisecond
+_last_ts_ms = 0
+_last_ts_str = ''
+
+def _now_iso() -> str:
+    global _last_ts_ms, _last_ts_str
+    ms = int(time.time() * 1000)
+    if ms != _last_ts_ms:
+        _last_ts_str = _utc_iso(ms / 1000)
+        _last_ts_ms = ms
+    return _last_ts_str
 
 class WebSocketManager:
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
         self.connection_metadata: Dict[str, Dict[str, Any]] = {}
+        # Each client has a queue of serialized frames drained by its own sender task
+        self.out_queues: Dict[str, asyncio.Queue] = {}
+        self.senders: Dict[str, asyncio.Task] = {}
+        # One (last_activity_ts, client_id) entry per client, rescheduled when found stale
+        self._activity_heap: List[Tuple[float, str]] = []
+        # group -> member ids, and each client's groups so disconnect doesn't scan every group
+        self.groups: Dict[str, Set[str]] = defaultdict(set)
+        self.client_groups: Dict[str, Tuple[str, ...]] = {}
+        # Clients that connected with metadata accepts_deflate and take zlib binary frames
+        self.deflate_clients: Set[str] = set()
+        # Cleanup task, started from the app's startup hook; _wake is set when the heap gains a head
+        self._cleanup_task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+
+    async def start(self, max_inactive_minutes: int = 30):
+        if self._cleanup_task is None or self._cleanup_task.done():
+            self._cleanup_task = asyncio.create_task(self.cleanup_inactive_connections(max_inactive_minutes))
+
+    async def stop(self):
+        if self._cleanup_task is not None:
+            self._cleanup_task.cancel()
+            self._cleanup_task = None
 
     async def connect(self, websocket: WebSocket, client_id: str, metadata: Optional[Dict[str, Any]] = None):
         await websocket.accept()
+        # A reconnect under the same id replaces the old sender task and queue
+        self.disconnect(client_id)
         self.active_connections[client_id] = websocket
+        now = time.monotonic()
         self.connection_metadata[client_id] = {
-            'connected_at': datetime.utcnow().isoformat(),
-            'last_activity': datetime.utcnow().isoformat(),
+            'connected_at_ts': now,
+            'last_activity_ts': now,
+            'scheduled_ts': now,  # ts of this client's live heap entry
             'metadata': metadata or {}
         }
+        if not self._activity_heap:
+            self._wake.set()
+        heapq.heappush(self._activity_heap, (now, client_id))
+        client_groups = tuple((metadata or {}).get('groups', ()))
+        for group in client_groups:
+            self.groups[group].add(client_id)
+        self.client_groups[client_id] = client_groups
+        if DEFLATE_ENABLED and (metadata or {}).get('accepts_deflate'):
+            self.deflate_clients.add(client_id)
+        else:
+            self.deflate_clients.discard(client_id)
+        queue = asyncio.Queue(maxsize=OUTBOUND_QUEUE_SIZE)
+        self.out_queues[client_id] = queue
+        self.senders[client_id] = asyncio.create_task(self._sender_loop(client_id, websocket, queue))
 
     def disconnect(self, client_id: str):
         if client_id in self.active_connections:
             del self.active_connections[client_id]
         if client_id in self.connection_metadata:
             del self.connection_metadata[client_id]
+        self._leave_groups(client_id)
+        self.deflate_clients.discard(client_id)
+        # Pending frames are dropped with the queue
+        self.out_queues.pop(client_id, None)
+        sender = self.senders.pop(client_id, None)
+        if sender is not None:
+            sender.cancel()
 
-    async def broadcast(self, event_type: str, data: Dict[str, Any]):
-        message = {
-            'type': event_type,
-            'data': data,
-            'timestamp': datetime.utcnow().isoformat()
-        }
+    def _leave_groups(self, client_id: str):
+        for group in self.client_groups.pop(client_id, ()):
+            members = self.groups.get(group)
+            if members is not None:
+                members.discard(client_id)
+                if not members:
+                    del self.groups[group]
+
+    async def _sender_loop(self, client_id: str, websocket: WebSocket, queue: asyncio.Queue):
+        """Write queued frames to one client until a send fails"""
+        # Bound once per connection rather than looked up on every frame
+        send_text = websocket.send_text
+        send_bytes = websocket.send_bytes
+        while True:
+            frames = [await queue.get()]
+            # Frames that piled up during the last send go out together in one batch frame
+            while not queue.empty():
+                frames.append(queue.get_nowait())
 
-        disconnected_clients = []
-        for client_id, connection in self.active_connections.items():
             try:
-                await connection.send_json(message)
-                self.connection_metadata[client_id]['last_activity'] = datetime.utcnow().isoformat()
+                for frame in _coalesce(frames):
+                    if isinstance(frame, bytes):
+                        await asyncio.wait_for(send_bytes(frame), SEND_TIMEOUT)
+                    else:
+                        await asyncio.wait_for(send_text(frame), SEND_TIMEOUT)
             except WebSocketDisconnect:
-                disconnected_clients.append(client_id)
+                break
             except Exception as e:
-                print(f"Error sending message to client {client_id}: {str(e)}")
-                disconnected_clients.append(client_id)
+                logger.error("Error sending message to client %s: %s", client_id, e)
+                break
+
+            metadata = self.connection_metadata.get(client_id)
+            if metadata is not None:
+                metadata['last_activity_ts'] = time.monotonic()
+
+        # The client may have reconnected under the same id in the meantime
+        if self.active_connections.get(client_id) is websocket:
+            self.disconnect(client_id)
+
+    def _enqueue(self, client_id: str, frame: Union[str, bytes]):
+        queue = self.out_queues.get(client_id)
+        if queue is None:
+            return
+        try:
+            queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            # Drop a client that cannot keep up instead of buffering without bound
+            logger.error("Outbound queue full for client %s, disconnecting", client_id)
+            self.disconnect(client_id)
+
+    def _compress(self, payload: bytes) -> Optional[bytes]:
+        """Compress a large broadcast payload once, if any client takes deflate frames"""
+        if not self.deflate_clients or len(payload) <= DEFLATE_MIN_SIZE:
+            return None
+        return zlib.compress(payload, DEFLATE_LEVEL)
 
+    def _enqueue_all(self, targets: Tuple[Tuple[str, asyncio.Queue], ...], frame: str,
+                     compressed: Optional[bytes] = None):
+        """Queue one frame for a snapshot of (client_id, queue) pairs"""
+        deflate_clients = self.deflate_clients if compressed is not None else ()
+        disconnected_clients = []
+        disconnected_clients_append = disconnected_clients.append
+        for client_id, queue in targets:
+            try:
+                queue.put_nowait(compressed if client_id in deflate_clients else frame)
+            except asyncio.QueueFull:
+                disconnected_clients_append(client_id)
+
+        # Disconnect after the loop so the snapshot is never mutated mid-iteration
         for client_id in disconnected_clients:
+            logger.error("Outbound queue full for client %s, disconnecting", client_id)
             self.disconnect(client_id)
 
+    async def broadcast(self, event_type: str, data: Dict[str, Any]):
+        message = {
+            'type': event_type,
+            'data': data,
+            'timestamp': _now_iso()
+        }
+
+        # Serialized once; every client gets the same frame
+        frame = _dumps(message)
+        self._enqueue_all(tuple(self.out_queues.items()), frame, self._compress(frame.encode()))
+
+    async def broadcast_json_bytes(self, payload: bytes):
+        """Send an already serialized JSON payload to every client"""
+        # Decoded once; clients JSON.parse text frames
+        frame = payload.decode()
+        self._enqueue_all(tuple(self.out_queues.items()), frame, self._compress(payload))
+
     async def send_personal_message(self, client_id: str, event_type: str, data: Dict[str, Any]):
         if client_id not in self.active_connections:
             return
@@ -52,64 +228,68 @@ class WebSocketManager:
         message = {
             'type': event_type,
             'data': data,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': _now_iso()
         }
 
-        try:
-            await self.active_connections[client_id].send_json(message)
-            self.connection_metadata[client_id]['last_activity'] = datetime.utcnow().isoformat()
-        except WebSocketDisconnect:
-            self.disconnect(client_id)
-        except Exception as e:
-            print(f"Error sending personal message to client {client_id}: {str(e)}")
-            self.disconnect(client_id)
+        self._enqueue(client_id, _dumps(message))
 
     async def broadcast_to_group(self, group: str, event_type: str, data: Dict[str, Any]):
         message = {
             'type': event_type,
             'data': data,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': _now_iso()
         }
 
-        disconnected_clients = []
-        for client_id, metadata in self.connection_metadata.items():
-            if group in metadata.get('metadata', {}).get('groups', []):
-                try:
-                    await self.active_connections[client_id].send_json(message)
-                    metadata['last_activity'] = datetime.utcnow().isoformat()
-                except WebSocketDisconnect:
-                    disconnected_clients.append(client_id)
-                except Exception as e:
-                    print(f"Error broadcasting to group member {client_id}: {str(e)}")
-                    disconnected_clients.append(client_id)
-
-        for client_id in disconnected_clients:
-            self.disconnect(client_id)
+        # Only the group's own members are visited
+        out_queues = self.out_queues
+        members = tuple(
+            (client_id, out_queues[client_id])
+            for client_id in self.groups.get(group, ())
+            if client_id in out_queues
+        )
+        frame = _dumps(message)
+        self._enqueue_all(members, frame, self._compress(frame.encode()))
 
     def get_active_connections_count(self) -> int:
         return len(self.active_connections)
 
     def get_client_metadata(self, client_id: str) -> Optional[Dict[str, Any]]:
-        return self.connection_metadata.get(client_id)
+        metadata = self.connection_metadata.get(client_id)
+        if metadata is None:
+            return None
+        # Activity is tracked as monotonic seconds; ISO strings are only built here
+        offset = time.time() - time.monotonic()
+        return {
+            'connected_at': _utc_iso(metadata['connected_at_ts'] + offset),
+            'last_activity': _utc_iso(metadata['last_activity_ts'] + offset),
+            'metadata': metadata['metadata']
+        }
 
     async def cleanup_inactive_connections(self, max_inactive_minutes: int = 30):
+        max_inactive = max_inactive_minutes * 60
         while True:
-            current_time = datetime.utcnow()
-            disconnected_clients = []
-
-            for client_id, metadata in self.connection_metadata.items():
-                last_activity = datetime.fromisoformat(metadata['last_activity'])
-                inactive_minutes = (current_time - last_activity).total_seconds() / 60
+            cutoff = time.monotonic() - max_inactive
+            heap = self._activity_heap
 
-                if inactive_minutes > max_inactive_minutes:
-                    disconnected_clients.append(client_id)
+            # Only the expired head of the heap is visited
+            while heap and heap[0][0] <= cutoff:
+                ts, client_id = heapq.heappop(heap)
+                metadata = self.connection_metadata.get(client_id)
+                if metadata is None or metadata['scheduled_ts'] != ts:
+                    continue  # left over from a closed connection
+                if metadata['last_activity_ts'] == ts:
+                    self.disconnect(client_id)
+                else:
+                    # Active since this entry was pushed; requeue at its latest activity
+                    metadata['scheduled_ts'] = metadata['last_activity_ts']
+                    heapq.heappush(heap, (metadata['scheduled_ts'], client_id))
 
-            for client_id in disconnected_clients:
-                self.disconnect(client_id)
-
-            await asyncio.sleep(60)  # Check every minute
+            # Sleep until the head entry can expire; with no clients, until one connects
+            timeout = heap[0][0] - cutoff if heap else None
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
 
 manager = WebSocketManager()
-
-# Start cleanup task
-asyncio.create_task(manager.cleanup_inactive_connections())
@@ -1,4 +1,4 @@
 #!/bin/bash
 source venv/bin/activate
 cd app
-uvicorn main:app --reload --host 0.0.0.0 --port 8000
+uvicorn main:app --reload --host 0.0.0.0 --port 8000 --ws-per-message-deflate false
@@ -0,0 +1,117 @@
+from types import SimpleNamespace
+import pytest
+
+def _get(doc, dotted):
+    for part in dotted.split('.'):
+        if not isinstance(doc, dict) or part not in doc:
+            return None, False
+        doc = doc[part]
+    return doc, True
+
+def _matches(doc, query):
+    for key, condition in (query or {}).items():
+        value, present = _get(doc, key)
+        if isinstance(condition, dict) and '$exists' in condition:
+            if present != condition['$exists']:
+                return False
+        elif isinstance(condition, dict) and '$in' in condition:
+            if value not in condition['$in']:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+def _slice(value, spec):
+    start, count = spec['$slice']
+    return value[start:start + count]
+
+def _project(doc, projection):
+    if not projection:
+        return dict(doc)
+    included = [k for k, v in projection.items() if k != '_id' and v == 1]
+    slices = {k: v for k, v in projection.items() if isinstance(v, dict) and '$slice' in v}
+    if not included:
+        # Exclusion projection ($slice alone counts as one): every other field is returned
+        result = {k: v for k, v in doc.items() if projection.get(k) != 0}
+        for k, spec in slices.items():
+            if k in result:
+                result[k] = _slice(result[k], spec)
+        return result
+    result = {k: doc[k] for k in included if k in doc}
+    for k, spec in slices.items():
+        if k in doc:
+            result[k] = _slice(doc[k], spec)
+    if projection.get('_id', 1):
+        result['_id'] = doc['_id']
+    return result
+
+class FakeCursor:
+    def __init__(self, docs):
+        self._docs = docs
+
+    def __aiter__(self):
+        self._iter = iter(self._docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    def batch_size(self, size):
+        return self
+
+    async def to_list(self, length=None):
+        return list(self._docs)
+
+class FakeCollection:
+    """In-memory stand-in for a Motor collection: equality, $exists, $in, flat projections and upserts"""
+
+    def __init__(self, docs=()):
+        self.docs = [dict(doc) for doc in docs]
+        self.find_calls = []
+
+    def find(self, query=None, projection=None):
+        self.find_calls.append((query, projection))
+        return FakeCursor([_project(doc, projection) for doc in self.docs if _matches(doc, query)])
+
+    async def find_one(self, query=None, projection=None):
+        self.find_calls.append((query, projection))
+        for doc in self.docs:
+            if _matches(doc, query):
+                return _project(doc, projection)
+        return None
+
+    async def insert_one(self, doc):
+        doc = {'_id': f'_{len(self.docs)}', **doc}
+        self.docs.append(doc)
+        return SimpleNamespace(inserted_id=doc['_id'])
+
+    async def bulk_write(self, requests, ordered=True):
+        matched = upserted = 0
+        for request in requests:
+            # pymongo's UpdateOne keeps its arguments in these private attributes
+            query, update = request._filter, request._doc
+            doc = next((doc for doc in self.docs if _matches(doc, query)), None)
+            if doc is not None:
+                matched += 1
+            elif request._upsert:
+                doc = {'_id': f'_{len(self.docs)}', **query}
+                self.docs.append(doc)
+                upserted += 1
+            else:
+                continue
+            doc.update(update.get('$set', {}))
+        return SimpleNamespace(matched_count=matched, upserted_count=upserted)
+
+    async def delete_one(self, query):
+        for i, doc in enumerate(self.docs):
+            if _matches(doc, query):
+                del self.docs[i]
+                return SimpleNamespace(deleted_count=1)
+        return SimpleNamespace(deleted_count=0)
+
+@pytest.fixture
+def fake_collection():
+    return FakeCollection
@@ -0,0 +1,5 @@
+import importlib
+
+def test_app_imports():
+    main = importlib.import_module('app.main')
+    assert main.app.routes
@@ -0,0 +1,42 @@
+import pytest
+from app.security import document_security
+from app.security.document_security import DocumentSecurity
+
+@pytest.fixture
+def security(tmp_path, monkeypatch):
+    # The key file is created under the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(document_security, '_shared_cipher', None)
+    return DocumentSecurity()
+
+METADATA = {'title': 'Quarterly report', 'author': 'someone', 'tags': ['finance'], 'pages': 3}
+
+def test_sensitive_fields_are_encrypted_and_round_trip(security):
+    encrypted = security.encrypt_document(b'body', METADATA)
+
+    assert 'title' not in encrypted['metadata']
+    assert 'author' not in encrypted['metadata']
+    assert 'tags' not in encrypted['metadata']
+    assert encrypted['metadata']['pages'] == 3
+    assert b'Quarterly report' not in repr(encrypted['metadata']).encode()
+
+    decrypted = security.decrypt_document(encrypted)
+    assert decrypted['content'] == b'body'
+    assert decrypted['metadata'] == METADATA
+
+def test_metadata_without_sensitive_fields_round_trips(security):
+    metadata = {'pages': 1}
+    decrypted = security.decrypt_document(security.encrypt_document(b'x', metadata))
+    assert decrypted['metadata'] == metadata
+
+def test_legacy_per_field_tokens_still_decrypt(security):
+    legacy = {
+        'content': security.cipher_suite.fernet.encrypt(b'old body'),
+        'metadata': {
+            'title': security.cipher_suite.fernet.encrypt(b'Old title').decode(),
+            'author': security.cipher_suite.fernet.encrypt(b'someone').decode()
+        }
+    }
+    decrypted = security.decrypt_document(legacy)
+    assert decrypted['content'] == b'old body'
+    assert decrypted['metadata'] == {'title': 'Old title', 'author': 'someone'}
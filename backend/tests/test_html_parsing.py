@@ -0,0 +1,101 @@
+import asyncio
+import pytest
+from app.processors.html_utils import _cached_tree, _text
+from app.processors.url_processor import URLProcessor
+
+XML_PAGE = (
+    '<?xml version="1.0" encoding="utf-8"?>'
+    '<html><head><title>Feed page</title></head><body><p>hello</p></body></html>'
+)
+
+@pytest.fixture
+def processor():
+    # The parsers don't touch the embedding model, so skip loading it
+    return object.__new__(URLProcessor)
+
+@pytest.mark.parametrize('content', [XML_PAGE, XML_PAGE.encode()], ids=['str', 'bytes'])
+def test_xml_declaration_is_parsed(content):
+    assert 'hello' in _text(_cached_tree(content))
+
+@pytest.mark.parametrize('content', ['', '  \n', b'', '<!-- nothing -->'])
+def test_empty_document_gives_empty_tree(content):
+    tree = _cached_tree(content)
+    assert tree.tag == 'html'
+    assert _text(tree) == ''
+
+@pytest.mark.parametrize('parser', ['_parse_notion', '_parse_confluence', '_parse_generic'])
+@pytest.mark.parametrize('html', [XML_PAGE, '', '   '])
+def test_parsers_handle_xml_declaration_and_empty_pages(processor, parser, html):
+    result = asyncio.run(getattr(processor, parser)(html))
+    assert isinstance(result['text'], str)
+    assert result['title'] == ('Feed page' if html == XML_PAGE else 'Untitled Page')
+
+def test_structure_of_empty_page(processor):
+    structure = processor._analyze_content_structure('')
+    assert structure['elements']['paragraphs'] == 0
+
+@pytest.mark.parametrize('name', ['GenericURLProcessor', 'NotionProcessor'])
+@pytest.mark.parametrize('content', [b'', b'   ', b'<p>fragment</p>'])
+def test_empty_and_bodiless_pages_parse_successfully(name, content):
+    from app.processors.url_processors import _parse_sync
+
+    result = _parse_sync(name, content)
+    assert result['success'] is True
+    assert result['text'] in ('', 'fragment')
+
+def test_url_preview_of_empty_page_is_successful(processor):
+    processor.supported_domains = {}
+    processor._preview_length = 1000
+
+    preview = asyncio.run(processor.get_preview(b'', {'url': 'https://example.com/empty'}))
+
+    assert preview['status'] == 'success'
+    assert preview['data']['preview'] == ''
+
+def test_empty_page_through_the_parse_pool():
+    from app.processors.url_processors import GenericURLProcessor, shutdown_parse_pool
+
+    processor = object.__new__(GenericURLProcessor)
+    try:
+        result = asyncio.run(processor.process_content(b''))
+    finally:
+        shutdown_parse_pool()
+
+    assert result['success'] is True
+    assert result['text'] == ''
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://team.notion.site/Page-1', 'NotionProcessor'),
+    ('https://notion.site/confluence-notes', 'NotionProcessor'),
+    ('https://acme.atlassian.net/wiki/spaces/X', 'ConfluenceProcessor'),
+    ('https://confluence.acme.com/display/X', 'ConfluenceProcessor'),
+    ('https://wiki.acme.com/confluence/display/X', 'ConfluenceProcessor'),
+    ('https://example.com/?ref=notion.site', 'GenericURLProcessor'),
+    ('https://example.com/blog/atlassian-news', 'GenericURLProcessor'),
+    ('https://notion.site.example.com/', 'GenericURLProcessor'),
+])
+def test_url_dispatch_uses_host(monkeypatch, url, expected):
+    from app.processors import url_processors
+
+    for name in ('GenericURLProcessor', 'NotionProcessor', 'ConfluenceProcessor'):
+        monkeypatch.setattr(url_processors, name, lambda client, name=name: name)
+
+    assert url_processors.get_url_processor(url, None) == expected
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://team.notion.site/Page-1', 'NotionProcessor'),
+    ('https://acme.atlassian.net/wiki/spaces/X', 'ConfluenceProcessor'),
+])
+def test_integration_dispatch_uses_host(monkeypatch, url, expected):
+    from app.processors import integration_processors
+
+    for name in ('NotionProcessor', 'ConfluenceProcessor'):
+        monkeypatch.setattr(integration_processors, name, lambda client, name=name: name)
+
+    assert integration_processors.get_integration_processor(url, None) == expected
+
+def test_integration_dispatch_rejects_other_urls():
+    from app.processors.integration_processors import get_integration_processor
+
+    with pytest.raises(ValueError):
+        get_integration_processor('https://example.com/?ref=notion.site', None)
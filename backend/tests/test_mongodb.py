@@ -0,0 +1,64 @@
+import asyncio
+import importlib.util
+from pathlib import Path
+
+# app/database.py (SQLAlchemy) shadows the app/database/ directory, so load the module by path
+_spec = importlib.util.spec_from_file_location(
+    'mongodb_manager', Path(__file__).parents[1] / 'app' / 'database' / 'mongodb.py'
+)
+_module = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_module)
+MongoDBManager = _module.MongoDBManager
+
+def test_get_chunk_returns_only_the_sliced_chunk(fake_collection):
+    vectors = fake_collection([{
+        '_id': 'v1',
+        'document_id': 'doc-1',
+        'chunks': ['first', 'second', 'third'],
+        'embeddings': b'\x00' * 1536,
+        'embeddings_i8': b'\x00' * 384,
+        'embeddings_bits': b'\x00' * 48
+    }])
+    manager = object.__new__(MongoDBManager)
+    manager.vectors = vectors
+
+    assert asyncio.run(manager.get_chunk('doc-1', 1)) == 'second'
+    # What the collection sends back for that projection
+    reply = asyncio.run(vectors.find_one(*vectors.find_calls[0]))
+    assert reply == {'document_id': 'doc-1', 'chunks': ['second']}
+    assert asyncio.run(manager.get_chunk('missing', 0)) is None
+
+    _, projection = vectors.find_calls[0]
+    # At least one plain inclusion, otherwise MongoDB returns the embedding blobs as well
+    assert any(value == 1 for value in projection.values())
+    assert set(projection) == {'_id', 'document_id', 'chunks'}
+
+def test_batch_update_vectors_upserts_each_document(fake_collection):
+    vectors = fake_collection([{'_id': 'v1', 'document_id': 'doc-1', 'chunks': ['old'], 'chunk_count': 1}])
+    manager = object.__new__(MongoDBManager)
+    manager.vectors = vectors
+
+    updated = asyncio.run(manager.batch_update_vectors([
+        {'document_id': 'doc-1', 'chunks': ['new', 'text'], 'chunk_count': 2},
+        {'document_id': 'doc-2', 'chunks': ['fresh'], 'chunk_count': 1}
+    ]))
+
+    assert updated is True
+    by_id = {doc['document_id']: doc for doc in vectors.docs}
+    assert set(by_id) == {'doc-1', 'doc-2'}
+    assert by_id['doc-1']['chunks'] == ['new', 'text']
+    assert by_id['doc-1']['_id'] == 'v1'
+    assert by_id['doc-2']['chunk_count'] == 1
+    assert asyncio.run(manager.batch_update_vectors([])) is True
+
+def test_delete_document_vectors_removes_only_that_document(fake_collection):
+    vectors = fake_collection([
+        {'_id': 'v1', 'document_id': 'doc-1', 'chunks': ['a']},
+        {'_id': 'v2', 'document_id': 'doc-2', 'chunks': ['b']}
+    ])
+    manager = object.__new__(MongoDBManager)
+    manager.vectors = vectors
+
+    assert asyncio.run(manager.delete_document_vectors('doc-1')) is True
+    assert [doc['document_id'] for doc in vectors.docs] == ['doc-2']
+    assert asyncio.run(manager.delete_document_vectors('doc-1')) is False
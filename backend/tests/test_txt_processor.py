@@ -0,0 +1,28 @@
+import asyncio
+import pytest
+from app.processors import txt_processor
+from app.processors.txt_processor import TXTProcessor
+
+@pytest.fixture
+def processor():
+    # process_content doesn't use the embedding model
+    return object.__new__(TXTProcessor)
+
+def _process(processor, content):
+    return asyncio.run(processor.process_content(content, {}))['content']
+
+def test_undetectable_encoding_falls_back_to_latin1(processor, monkeypatch):
+    class NoMatch:
+        def best(self):
+            return None
+
+    monkeypatch.setattr(txt_processor, 'from_bytes', lambda content: NoMatch())
+
+    assert _process(processor, b'caf\xe9 \xff') == 'caf\xe9 \xff'
+
+def test_delete_character_is_kept_and_other_controls_removed(processor):
+    assert _process(processor, b'a\x7fb\x00c\x1bd\te') == 'a\x7fbcd\te'
+
+def test_non_utf8_input_is_detected(processor):
+    text = 'Привет, мир! Это текстовый документ в кодировке cp1251.'
+    assert _process(processor, text.encode('cp1251')) == text
@@ -0,0 +1,48 @@
+import asyncio
+import orjson
+from fastapi import WebSocketDisconnect
+from app.routers import urls
+from app.websocket_manager import WebSocketManager
+
+class FakeWebSocket:
+    def __init__(self, incoming):
+        self.incoming = list(incoming)
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def receive_text(self):
+        # Let the manager's sender task run between messages
+        await asyncio.sleep(0)
+        if not self.incoming:
+            raise WebSocketDisconnect()
+        return self.incoming.pop(0)
+
+    async def send_text(self, data):
+        self.sent.append(orjson.loads(data))
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+def test_url_processing_socket_registers_and_cleans_up(monkeypatch):
+    async def scenario():
+        manager = WebSocketManager()
+        monkeypatch.setattr(urls, 'ws_manager', manager)
+        websocket = FakeWebSocket([orjson.dumps({'type': 'url_status'}).decode()])
+
+        async def broadcast_on_connect(*args):
+            # Registered under a generated client id, so broadcasts reach this socket
+            await WebSocketManager.connect(manager, *args)
+            assert manager.get_active_connections_count() == 1
+            await manager.broadcast('url_processed', {'url': 'https://example.com'})
+
+        monkeypatch.setattr(manager, 'connect', broadcast_on_connect)
+        await urls.websocket_endpoint(websocket)
+
+        assert {'type': 'url_status_response', 'status': 'active'} in websocket.sent
+        assert any(frame.get('type') == 'url_processed' for frame in websocket.sent)
+        assert manager.get_active_connections_count() == 0
+        assert manager.senders == {}
+
+    asyncio.run(scenario())
@@ -0,0 +1,121 @@
+import asyncio
+import pytest
+import numpy as np
+from app.vector_store import pack_embedding
+from app.processors.document_processor import DocumentProcessor
+
+class FakeModel:
+    def __init__(self, vector):
+        self.vector = np.asarray(vector, dtype=np.float32)
+
+    def encode(self, text, normalize_embeddings=True):
+        return self.vector
+
+def _unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+def test_search_documents_scores_binary_and_array_vectors(fake_collection):
+    collection = fake_collection([
+        {'_id': 1, 'content': 'packed', 'vector_embedding': pack_embedding(_unit(1, 0, 0))},
+        {'_id': 2, 'content': 'legacy', 'vector_embedding': _unit(0.6, 0.8, 0).tolist()},
+        {'_id': 3, 'content': 'far', 'vector_embedding': pack_embedding(_unit(0, 0, 1))},
+        {'_id': 4, 'content': 'no vector'}
+    ])
+    processor = DocumentProcessor()
+    processor.model = FakeModel(_unit(1, 0, 0))
+    processor.collection = collection
+
+    results = asyncio.run(processor.search_documents('query', limit=2))
+
+    assert [doc['content'] for doc in results] == ['packed', 'legacy']
+    assert results[0]['similarity'] == pytest.approx(1.0)
+    assert results[0]['_id'] == '1'
+    # Scoring reads only ids and vectors
+    assert collection.find_calls[0][1] == {'_id': 1, 'vector_embedding': 1}
+
+def test_search_similar_projects_vectors_then_fetches_winners(fake_collection):
+    from types import SimpleNamespace
+    from app.processors.base_processor import BaseProcessor
+
+    class Processor(BaseProcessor):
+        content_type = 'test'
+
+        async def process_content(self, content, metadata):
+            return {}
+
+    collection = fake_collection([
+        {'_id': i, 'title': f'doc {i}', 'text': 'x' * 100, 'vector_embedding': pack_embedding(_unit(1, i, 0))}
+        for i in range(5)
+    ])
+    processor = object.__new__(Processor)
+    processor.model = FakeModel(_unit(1, 0, 0))
+    processor._mongodb = SimpleNamespace(knowledge_window=SimpleNamespace(documents=collection))
+
+    results = asyncio.run(processor.search_similar('query', limit=2))
+
+    assert [doc['title'] for doc in results] == ['doc 0', 'doc 1']
+    (score_query, score_projection), (fetch_query, fetch_projection) = collection.find_calls
+    assert score_projection == {'_id': 1, 'vector_embedding': 1}
+    assert fetch_query == {'_id': {'$in': [0, 1]}}
+    assert 'vector_embedding' not in fetch_projection
+
+def test_client_search_filters_thresholds_and_fetches_content_for_hits(fake_collection):
+    from app.vector_store import VectorStore
+
+    collection = fake_collection([
+        {'_id': 1, 'content': 'pdf match', 'metadata': {'content_type': 'pdf'},
+         'vector_embedding': pack_embedding(_unit(1, 0, 0))},
+        {'_id': 2, 'content': 'pdf orthogonal', 'metadata': {'content_type': 'pdf'},
+         'vector_embedding': pack_embedding(_unit(0, 1, 0))},
+        {'_id': 3, 'content': 'txt match', 'metadata': {'content_type': 'txt'},
+         'vector_embedding': _unit(1, 0, 0).tolist()}
+    ])
+    store = object.__new__(VectorStore)
+    store.collection = collection
+
+    results = asyncio.run(store._client_search(_unit(1, 0, 0).tolist(), 5, 'pdf', 0.5))
+
+    assert [doc['content'] for doc in results] == ['pdf match']
+    (_, score_projection), (fetch_query, fetch_projection) = collection.find_calls
+    assert score_projection == {'_id': 1, 'vector_embedding': 1}
+    assert fetch_query == {'_id': {'$in': [1]}}
+    assert fetch_projection == {'content': 1, 'metadata': 1}
+
+def test_process_text_stores_a_packed_vector(fake_collection):
+    collection = fake_collection()
+    processor = DocumentProcessor()
+    processor.model = FakeModel(_unit(0.6, 0.8, 0))
+    processor.collection = collection
+
+    result = asyncio.run(processor._process_text('hello', 'txt'))
+
+    stored = collection.docs[0]['vector_embedding']
+    assert stored == pack_embedding(_unit(0.6, 0.8, 0))
+    assert result['vector_embedding'] == pytest.approx([0.6, 0.8, 0.0])
+    assert result['_id'] == collection.docs[0]['_id']
+
+def test_legacy_array_vectors_are_scored_by_cosine(fake_collection):
+    from app.vector_store import unpack_embedding
+
+    collection = fake_collection([
+        # Un-normalized legacy array: large magnitude, smaller angle match
+        {'_id': 1, 'content': 'legacy', 'vector_embedding': [3.0, 4.0, 0.0]},
+        {'_id': 2, 'content': 'packed', 'vector_embedding': pack_embedding(_unit(0.8, 0.6, 0))}
+    ])
+    processor = DocumentProcessor()
+    processor.model = FakeModel(_unit(1, 0, 0))
+    processor.collection = collection
+
+    results = asyncio.run(processor.search_documents('query', limit=2))
+
+    assert [doc['content'] for doc in results] == ['packed', 'legacy']
+    assert results[1]['similarity'] == pytest.approx(0.6)
+    assert np.linalg.norm(unpack_embedding([3.0, 4.0])) == pytest.approx(1.0)
+    assert not np.any(unpack_embedding([0.0, 0.0]))
+
+def test_calculate_similarity_is_cosine_for_unnormalized_inputs():
+    from app.vector_search import VectorSearch
+
+    search = object.__new__(VectorSearch)
+    assert search.calculate_similarity([1.0, 0.0], [3.0, 4.0]) == pytest.approx(0.6)
@@ -0,0 +1,152 @@
+import asyncio
+import orjson
+from app.websocket_handlers import WebSocketHandler
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data):
+        self.sent.append(orjson.loads(data))
+
+class FakeDocumentProcessor:
+    def __init__(self):
+        self.calls = []
+
+    async def get_preview(self, content, metadata):
+        self.calls.append((bytes(content), metadata))
+        return {'status': 'success', 'data': {'preview': bytes(content).decode(), 'metadata': metadata}}
+
+def _handler():
+    handler = WebSocketHandler()
+    processor = FakeDocumentProcessor()
+    handler.processors = {'document': lambda content_type: processor}
+    return handler, processor
+
+def _header(content_len, node_id='n1'):
+    return orjson.dumps({
+        'type': 'preview_requested',
+        'contentLen': content_len,
+        'payload': {'nodeType': 'txt', 'nodeId': node_id, 'data': {'metadata': {'filename': 'a.txt'}}}
+    })
+
+def test_binary_preview_upload_is_reassembled():
+    async def scenario():
+        handler, processor = _handler()
+        websocket = FakeWebSocket()
+        await handler.connect(websocket, 'c1')
+
+        await handler.handle_message('c1', _header(11))
+        await handler.handle_message('c1', b'hello ')
+        assert websocket.sent == []
+        await handler.handle_message('c1', memoryview(b'world'))
+
+        assert processor.calls == [(b'hello world', {'filename': 'a.txt'})]
+        assert websocket.sent[0]['type'] == 'preview_updated'
+        assert websocket.sent[0]['payload']['nodeId'] == 'n1'
+        assert websocket.sent[0]['payload']['preview']['preview'] == 'hello world'
+        assert 'c1' not in handler._pending_uploads
+
+    asyncio.run(scenario())
+
+def test_empty_binary_preview_upload_completes_immediately():
+    async def scenario():
+        handler, processor = _handler()
+        websocket = FakeWebSocket()
+        await handler.connect(websocket, 'c1')
+
+        await handler.handle_message('c1', _header(0))
+
+        assert processor.calls == [(b'', {'filename': 'a.txt'})]
+        assert websocket.sent[0]['type'] == 'preview_updated'
+        assert 'c1' not in handler._pending_uploads
+
+    asyncio.run(scenario())
+
+def test_binary_preview_upload_overrun_is_rejected():
+    async def scenario():
+        handler, processor = _handler()
+        websocket = FakeWebSocket()
+        await handler.connect(websocket, 'c1')
+
+        await handler.handle_message('c1', _header(4))
+        await handler.handle_message('c1', b'too long')
+
+        assert processor.calls == []
+        assert websocket.sent[0]['type'] == 'error'
+        assert 'contentLen' in websocket.sent[0]['payload']['message']
+        assert 'c1' not in handler._pending_uploads
+
+    asyncio.run(scenario())
+
+def test_oversized_content_length_is_rejected():
+    async def scenario():
+        handler, processor = _handler()
+        websocket = FakeWebSocket()
+        await handler.connect(websocket, 'c1')
+
+        await handler.handle_message('c1', _header(-1))
+
+        assert websocket.sent[0]['type'] == 'error'
+        assert 'c1' not in handler._pending_uploads
+
+    asyncio.run(scenario())
+
+def test_disconnect_drops_pending_upload():
+    async def scenario():
+        handler, _ = _handler()
+        await handler.connect(FakeWebSocket(), 'c1')
+
+        await handler.handle_message('c1', _header(8))
+        await handler.handle_message('c1', b'half')
+        handler.disconnect('c1')
+
+        assert 'c1' not in handler._pending_uploads
+
+    asyncio.run(scenario())
+
+class FakeSocketConnection(FakeWebSocket):
+    """Incoming ASGI messages for an endpoint that reads with websocket.receive()"""
+
+    def __init__(self, incoming):
+        super().__init__()
+        self.incoming = list(incoming)
+
+    async def receive(self):
+        if not self.incoming:
+            return {'type': 'websocket.disconnect', 'code': 1000}
+        return self.incoming.pop(0)
+
+def test_preview_endpoint_forwards_text_and_binary_frames(monkeypatch):
+    from app import main
+
+    handler, processor = _handler()
+    monkeypatch.setattr(main, 'websocket_handler', handler)
+    websocket = FakeSocketConnection([
+        {'type': 'websocket.receive', 'text': _header(5).decode()},
+        {'type': 'websocket.receive', 'bytes': b'hel'},
+        {'type': 'websocket.receive', 'bytes': b'lo'}
+    ])
+
+    asyncio.run(main.preview_websocket(websocket))
+
+    assert processor.calls == [(b'hello', {'filename': 'a.txt'})]
+    assert websocket.sent[0]['type'] == 'preview_updated'
+    assert handler.active_connections == {}
+
+def test_initialize_builds_processors_with_the_shared_client(tmp_path, monkeypatch):
+    from app.processors import base_processor
+
+    # DocumentSecurity writes its key file under the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(base_processor, 'get_model', lambda name: None)
+    client = object()
+    handler = WebSocketHandler()
+
+    asyncio.run(handler.initialize(client))
+
+    assert handler.processors['url']._mongodb is client
+    assert handler.processors['document']('text/plain')._mongodb is client
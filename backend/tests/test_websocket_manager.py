@@ -0,0 +1,143 @@
+import asyncio
+import zlib
+import orjson
+from app import websocket_manager
+from app.websocket_manager import WebSocketManager
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data):
+        await asyncio.sleep(self.delay)
+        self.sent.append(data)
+
+    async def send_bytes(self, data):
+        await asyncio.sleep(self.delay)
+        self.sent.append(data)
+
+def _run(coro):
+    return asyncio.run(coro)
+
+BIG = {'text': 'x' * 4096}
+
+def test_deflate_is_off_by_default():
+    async def scenario():
+        manager = WebSocketManager()
+        ws = FakeWebSocket()
+        await manager.connect(ws, 'a', {'accepts_deflate': True})
+        await manager.broadcast('big', BIG)
+        await asyncio.sleep(0.01)
+        return ws.sent
+
+    sent = _run(scenario())
+    assert [orjson.loads(frame)['data'] for frame in sent] == [BIG]
+
+def test_deflate_opt_in_sends_zlib_frames(monkeypatch):
+    monkeypatch.setattr(websocket_manager, 'DEFLATE_ENABLED', True)
+
+    async def scenario():
+        manager = WebSocketManager()
+        deflate, plain = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(deflate, 'a', {'accepts_deflate': True})
+        await manager.connect(plain, 'b')
+        await manager.broadcast('big', BIG)
+        await asyncio.sleep(0.01)
+        return deflate.sent, plain.sent
+
+    deflate_sent, plain_sent = _run(scenario())
+    assert isinstance(deflate_sent[0], bytes)
+    assert orjson.loads(zlib.decompress(deflate_sent[0]))['data'] == BIG
+    assert isinstance(plain_sent[0], str)
+
+def test_reconnect_cancels_the_previous_sender():
+    async def scenario():
+        manager = WebSocketManager()
+        old, new = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(old, 'a', {'groups': ['g']})
+        old_sender = manager.senders['a']
+        await manager.connect(new, 'a', {'groups': ['g']})
+        await asyncio.sleep(0)
+        await manager.broadcast_to_group('g', 'event', {})
+        await asyncio.sleep(0.01)
+        # Checked inside the loop; asyncio.run cancels leftover tasks on exit
+        return manager, old, new, old_sender.done()
+
+    manager, old, new, old_sender_done = _run(scenario())
+    assert old_sender_done
+    assert old.sent == []
+    assert len(new.sent) == 1
+    assert manager.groups['g'] == {'a'}
+
+def test_full_outbound_queue_disconnects_the_client(monkeypatch):
+    monkeypatch.setattr(websocket_manager, 'OUTBOUND_QUEUE_SIZE', 2)
+
+    async def scenario():
+        manager = WebSocketManager()
+        slow, fast = FakeWebSocket(delay=1.0), FakeWebSocket()
+        await manager.connect(slow, 'slow')
+        await manager.connect(fast, 'fast')
+        await asyncio.sleep(0)
+        # The slow sender holds one frame in flight; the queue then fills behind it
+        for i in range(4):
+            await manager.broadcast('event', {'i': i})
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+        return manager, fast
+
+    manager, fast = _run(scenario())
+    assert 'slow' not in manager.active_connections
+    assert 'slow' not in manager.senders
+    assert 'fast' in manager.active_connections
+    items = []
+    for frame in fast.sent:
+        message = orjson.loads(frame)
+        items.extend(message['items'] if message['type'] == 'batch' else [message])
+    assert [item['data']['i'] for item in items] == [0, 1, 2, 3]
+
+def test_queued_frames_are_coalesced_into_one_batch():
+    async def scenario():
+        manager = WebSocketManager()
+        ws = FakeWebSocket(delay=0.01)
+        await manager.connect(ws, 'a')
+        await manager.broadcast('first', {})
+        await asyncio.sleep(0.001)
+        # Queued while the first frame is still being sent
+        for i in range(3):
+            await manager.send_personal_message('a', 'update', {'i': i})
+        await asyncio.sleep(0.05)
+        return ws.sent
+
+    first, batch = [orjson.loads(frame) for frame in _run(scenario())]
+    assert first['type'] == 'first'
+    assert batch['type'] == 'batch'
+    assert [item['data']['i'] for item in batch['items']] == [0, 1, 2]
+
+def test_coalesce_keeps_compressed_frames_separate():
+    frames = ['{"a":1}', '{"a":2}', b'zlib', '{"a":3}']
+    assert websocket_manager._coalesce(frames) == [
+        '{"type":"batch","items":[{"a":1},{"a":2}]}', b'zlib', '{"a":3}'
+    ]
+
+def test_timestamps_are_naive_utc_iso(monkeypatch):
+    import warnings
+    from datetime import datetime
+
+    async def scenario():
+        manager = WebSocketManager()
+        await manager.connect(FakeWebSocket(), 'c1')
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', DeprecationWarning)
+            metadata = manager.get_client_metadata('c1')
+            stamp = websocket_manager._now_iso()
+        manager.disconnect('c1')
+        return metadata, stamp
+
+    assert websocket_manager._utc_iso(0) == '1970-01-01T00:00:00'
+    metadata, stamp = _run(scenario())
+    for value in (metadata['connected_at'], metadata['last_activity'], stamp):
+        assert datetime.fromisoformat(value).tzinfo is None
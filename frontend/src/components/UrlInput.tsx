@@ -22,8 +22,7 @@ export const UrlInput: React.FC<UrlInputProps> = ({
 
   useEffect(() => {
     const websocket = new WebSocket(wsEndpoint);
-    websocket.onmessage = (event) => {
-      const data = JSON.parse(event.data);
+    const handleMessage = (data: any) => {
       if (data.type === 'url_processing') {
         if (data.status === 'completed') {
           setIsProcessing(false);
@@ -46,6 +45,12 @@ export const UrlInput: React.FC<UrlInputProps> = ({
         }
       }
     };
+    websocket.onmessage = (event) => {
+      const message = JSON.parse(event.data);
+      // Bursts of events arrive coalesced as {type: 'batch', items: [...]}
+      const items = message.type === 'batch' ? message.items : [message];
+      items.forEach(handleMessage);
+    };
     setWs(websocket);
     return () => websocket.close();
   }, [wsEndpoint]);